@@ -0,0 +1,91 @@
+# benchmarks/startup.py
+"""Measure GUI cold start up to the first drawn frame and enforce a budget.
+
+Each run starts a fresh interpreter, imports gui.py, builds the main window
+and waits for Tk to draw it. Exits with status 1 if the median exceeds
+``--budget`` seconds, or if a heavy module is imported before the first frame.
+
+    python benchmarks/startup.py --runs 5 --budget 1.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINGS_DIR = os.path.join(ROOT, "lings")
+
+# 首帧之前不应导入的模块
+DEFERRED_MODULES = ["pandas", "requests", "docx", "texteditor", "diceditor"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {lings_dir!r})
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print(json.dumps({{"skipped": str(e)}}))
+    sys.exit(0)
+import gui
+app = gui.TranslationApp(root)
+root.update()
+first_frame = time.perf_counter() - start
+loaded = [m for m in {deferred!r} if m in sys.modules]
+root.destroy()
+print(json.dumps({{"first_frame": first_frame, "loaded": loaded}}))
+"""
+
+
+def run_once():
+    code = CHILD.format(lings_dir=LINGS_DIR, deferred=DEFERRED_MODULES)
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget", type=float, default=1.0, help="seconds to first frame"
+    )
+    args = parser.parse_args(argv)
+
+    results = [run_once() for _ in range(args.runs)]
+    if "skipped" in results[0]:
+        print(f"skipped: no display ({results[0]['skipped']})")
+        return 0
+
+    first_frame = statistics.median(r["first_frame"] for r in results)
+    process = statistics.median(r["process"] for r in results)
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    print(f"first frame: {first_frame:.3f}s (median of {args.runs})")
+    print(f"process incl. interpreter start: {process:.3f}s")
+    print(f"budget: {args.budget:.3f}s")
+
+    failed = False
+    if first_frame > args.budget:
+        print("FAIL: startup exceeds budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported before first frame: {', '.join(loaded)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
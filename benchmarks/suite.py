@@ -0,0 +1,424 @@
+# benchmarks/suite.py
+"""Time the translation pipeline on synthetic data and compare with a baseline.
+
+Measures dictionary loading, ``translate_text`` under every option
+combination and from a snapshot, fuzzy suggestions for single-typo segments,
+``translate_document`` end to end with both engines, and the editors' data
+loading. Each case reports the best wall time of ``--repeat`` runs and the
+peak Python memory of one extra run under tracemalloc. Cases slower or
+larger than the stored baseline by more than ``--tolerance`` are reported
+and make the exit status 1.
+
+    python benchmarks/suite.py                       # compare with baseline.json
+    python benchmarks/suite.py --quick -k translate_text
+    python benchmarks/suite.py --save-baseline       # after an intended change
+
+Timings depend on the machine; record a baseline on the machine that runs
+the comparison. Generated data is kept in ``--workdir`` between runs.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINGS_DIR = os.path.join(ROOT, "lings")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_WORKDIR = os.path.join(BENCH_DIR, ".data")
+sys.path.insert(0, LINGS_DIR)
+
+import synthetic  # noqa: E402
+
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000, "500k": 500000, "1m": 1000000}
+TEXT_SEGMENTS = 2000
+# 短于这些差值的变化视为噪声，不算回退
+MIN_TIME_DELTA = 0.005
+MIN_PEAK_DELTA = 1024 * 1024
+
+# 文档名: (语言对, 词典大小, 段落数, 表格数, 是否合并单元格)
+DOCUMENTS = {
+    "paragraphs": ("en_cn", "100k", 2000, 0, False),
+    "tables": ("en_cn", "100k", 100, 20, True),
+    "cjk_to_arabic": ("zh_ar", "10k", 1000, 5, True),
+}
+QUICK_DOCUMENTS = {
+    "paragraphs": ("en_cn", "1k", 200, 0, False),
+    "tables": ("en_cn", "1k", 20, 2, True),
+    "cjk_to_arabic": ("zh_ar", "1k", 100, 1, True),
+}
+
+
+def document_label(name, spec):
+    # 用例名带上数据规模，--quick 与完整运行的结果不会共用同一条基线
+    _, size, paragraphs, tables, _ = spec
+    label = f"{name},{size},{paragraphs}p"
+    return f"{label},{tables}t" if tables else label
+
+
+class Workspace:
+    """Generated dictionaries and documents, created on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._entries = {}
+
+    def dictionary(self, language, size):
+        path = os.path.join(self.path, f"{language}_bench_{size}.json")
+        if not os.path.exists(path):
+            source, target = synthetic.language_scripts(language)
+            entries = synthetic.make_entries(SIZES[size], source, target)
+            synthetic.write_dictionary(path, entries)
+            print(f"generated {path}", file=sys.stderr)
+        return path
+
+    def entries(self, language, size):
+        key = (language, size)
+        if key not in self._entries:
+            with open(self.dictionary(language, size), "r", encoding="utf-8") as f:
+                self._entries[key] = json.load(f)["translations"]
+        return self._entries[key]
+
+    def typos(self, language, size, count):
+        return synthetic.make_typos(self.entries(language, size), count)
+
+    def segments(self, language, size, count):
+        source, _ = synthetic.language_scripts(language)
+        return synthetic.make_segments(self.entries(language, size), count, source)
+
+    def document(self, name, spec):
+        language, size, paragraphs, tables, merged = spec
+        path = os.path.join(
+            self.path, f"{name}_{language}_{size}_{paragraphs}_{tables}.docx"
+        )
+        if not os.path.exists(path):
+            segments = self.segments(language, size, 1000)
+            synthetic.make_docx(
+                path, segments, paragraphs, tables, merged=merged, seed=1
+            )
+            print(f"generated {path}", file=sys.stderr)
+        return path
+
+
+class EditorStub:
+    """Just the attributes the editors' loading methods use, without Tk."""
+
+    class Var:
+        def __init__(self, value):
+            self.value = value
+
+        def get(self):
+            return self.value
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+    def update_treeview(self):
+        pass
+
+    def apply_filter(self):
+        pass
+
+
+def measure(run, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    # 内存单独再跑一次，tracemalloc 的开销不计入耗时
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": min(times), "peak": peak}
+
+
+def dictionary_cases(workspace, sizes):
+    from translator import Translator
+
+    cases = []
+    for size in sizes:
+        path = workspace.dictionary("en_cn", size)
+        for source, use_snapshot in (("json", False), ("snapshot", True)):
+
+            def setup(path=path, use_snapshot=use_snapshot):
+                # 构造时已加载一次（快照也在此时编译），计时只包括再次加载
+                translator = Translator("en_cn", path, use_snapshot=use_snapshot)
+                return translator.load_word_dict
+
+            cases.append((f"load_word_dict[{source},{size}]", setup))
+    return cases
+
+
+def translate_text_cases(workspace, size):
+    from translator import Translator
+
+    path = workspace.dictionary("en_cn", size)
+    segments = workspace.segments("en_cn", size, TEXT_SEGMENTS)
+    cases = []
+    for options in itertools.product((True, False), repeat=3):
+        strict_punctuation, ignore_case, partial_match = options
+
+        def setup(options=options):
+            translator = Translator("en_cn", path, *options)
+            if translator.partial_match:
+                translator.get_matcher()  # 自动机只构建一次，不计入逐段耗时
+
+            def run():
+                translator.invalidate_caches()
+                for segment in segments:
+                    translator.translate_text(segment)
+
+            return run
+
+        name = (
+            f"translate_text[strict={int(strict_punctuation)},"
+            f"ignore_case={int(ignore_case)},partial={int(partial_match)},{size}]"
+        )
+        cases.append((name, setup))
+
+    def setup_snapshot():
+        # 批量翻译默认使用快照，逐段查询经由内存映射的词条表
+        translator = Translator("en_cn", path, use_snapshot=True)
+
+        def run():
+            translator.invalidate_caches()
+            for segment in segments:
+                translator.translate_text(segment)
+
+        return run
+
+    cases.append((f"translate_text[snapshot,{size}]", setup_snapshot))
+    return cases
+
+
+def fuzzy_cases(workspace, size):
+    from translator import Translator
+
+    path = workspace.dictionary("en_cn", size)
+    typos = workspace.typos("en_cn", size, TEXT_SEGMENTS)
+
+    def setup():
+        translator = Translator("en_cn", path)
+        report = [{"text": typo} for typo in typos]
+        # 索引和词表三元组在首次查询时构建，不计入查询耗时
+        translator.suggest_translations(report[:1])
+
+        def run():
+            translator.suggest_translations(report)
+
+        return run
+
+    return [(f"fuzzy_lookup[typo,{size}]", setup)]
+
+
+def document_cases(workspace, documents):
+    from translator import Translator
+
+    cases = []
+    for name, spec in documents.items():
+        language, size = spec[0], spec[1]
+        input_file = workspace.document(name, spec)
+        output_file = os.path.join(workspace.path, f"{name}_out.docx")
+        for engine in ("docx", "streaming"):
+
+            def setup(
+                language=language,
+                size=size,
+                engine=engine,
+                input_file=input_file,
+                output_file=output_file,
+            ):
+                translator = Translator(language, workspace.dictionary(language, size))
+                if engine == "streaming":
+                    translate = translator.translate_document_streaming
+                else:
+                    translate = translator.translate_document
+
+                def run():
+                    translator.invalidate_caches()
+                    translate(input_file, output_file)
+
+                return run
+
+            cases.append(
+                (f"translate_document[{document_label(name, spec)},{engine}]", setup)
+            )
+    return cases
+
+
+def editor_cases(workspace, sizes, documents):
+    from diceditor import DictionaryEditor
+    from entrystore import EntryStore
+    from search import SearchIndex
+    from texteditor import TextEditor
+
+    cases = []
+    for size in sizes:
+        path = workspace.dictionary("en_cn", size)
+
+        def setup(path=path):
+            def run():
+                store = EntryStore()
+                editor = EditorStub(
+                    file_path=path, store=store, search=SearchIndex(store)
+                )
+                DictionaryEditor.load_dictionary(editor)
+
+            return run
+
+        cases.append((f"editor_load[dictionary,{size}]", setup))
+
+    name = "paragraphs"
+    input_file = workspace.document(name, documents[name])
+
+    def setup_text():
+        def run():
+            editor = EditorStub(
+                file_path=EditorStub.Var(input_file), store=EntryStore(), scores={}
+            )
+            TextEditor.load_word_file(editor)
+
+        return run
+
+    cases.append(
+        (f"editor_load[text,{document_label(name, documents[name])}]", setup_text)
+    )
+    return cases
+
+
+def compare(results, baseline, tolerance):
+    """Return the names of cases that regressed against ``baseline``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result["time"] - base["time"]
+        larger = result["peak"] - base["peak"]
+        if (slower > MIN_TIME_DELTA and slower > base["time"] * tolerance) or (
+            larger > MIN_PEAK_DELTA and larger > base["peak"] * tolerance
+        ):
+            regressions.append(name)
+    return regressions
+
+
+def change(value, base):
+    if not base:
+        return ""
+    return f"{(value - base) / base:+.0%}"
+
+
+def print_results(results, baseline):
+    width = max(len(name) for name in results)
+    print(f"{'case':<{width}}  {'time':>10} {'Δ':>6}  {'peak MiB':>9} {'Δ':>6}")
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print(
+            f"{name:<{width}}  {result['time'] * 1000:>8.1f}ms"
+            f" {change(result['time'], base.get('time')):>6}"
+            f"  {result['peak'] / 2**20:>9.1f}"
+            f" {change(result['peak'], base.get('peak')):>6}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1k,10k,100k,1m",
+        help="dictionary sizes for loading cases (1k, 10k, 100k, 1m)",
+    )
+    parser.add_argument("--quick", action="store_true", help="small data only")
+    parser.add_argument("-k", dest="pattern", help="only cases containing this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store results as the baseline"
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    workspace = Workspace(args.workdir)
+    from logutil import setup_logging
+
+    # 日志写到工作目录，不留在仓库里
+    setup_logging(os.path.join(workspace.path, "translation.log"))
+
+    sizes = ["1k", "10k"] if args.quick else args.sizes.split(",")
+    documents = QUICK_DOCUMENTS if args.quick else DOCUMENTS
+    text_size = "1k" if args.quick else "10k"
+    fuzzy_size = "10k" if args.quick else "500k"
+    cases = (
+        dictionary_cases(workspace, sizes)
+        + translate_text_cases(workspace, text_size)
+        + fuzzy_cases(workspace, fuzzy_size)
+        + document_cases(workspace, documents)
+        + editor_cases(workspace, sizes, documents)
+    )
+    if args.pattern:
+        cases = [case for case in cases if args.pattern in case[0]]
+
+    results = {}
+    for name, setup in cases:
+        run = setup()
+        results[name] = measure(run, args.repeat)
+        del run
+        print(
+            f"{name}: {results[name]['time'] * 1000:.1f}ms",
+            file=sys.stderr,
+        )
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # 只替换本次运行的用例，其余基线保留
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                report["results"] = {**json.load(f)["results"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"FAIL: {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for name in regressions:
+            print(f"  {name}")
+        return 1
+    if baseline:
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# benchmarks/synthetic.py
+"""Generate synthetic Lings dictionaries and Word documents for benchmarks.
+
+Output is deterministic for a given seed, so runs on different machines or
+commits translate exactly the same data::
+
+    python benchmarks/synthetic.py dictionary en_cn_bench.json --entries 100000
+    python benchmarks/synthetic.py docx bench.docx --dictionary en_cn_bench.json \
+        --paragraphs 2000 --tables 10 --merged
+"""
+
+import argparse
+import itertools
+import json
+import random
+from docx import Document
+
+# 拉丁字母词由音节拼成，中文和阿拉伯文直接取字符，按序号编码保证不重复
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"] + [
+    "an",
+    "el",
+    "in",
+    "or",
+    "us",
+    "ex",
+    "ta",
+    "qu",
+]
+CJK_CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+ARABIC_LETTERS = [chr(c) for c in range(0x0621, 0x063B)] + [
+    chr(c) for c in range(0x0641, 0x064B)
+]
+
+SCRIPTS = {
+    # 名称: (字母表, 每个词的最少符号数, 词之间的分隔符)
+    "latin": (SYLLABLES, 2, " "),
+    "cjk": (CJK_CHARS, 2, ""),
+    "arabic": (ARABIC_LETTERS, 3, " "),
+}
+
+# 语言对代码对应的文字，例如 en_cn 为 latin -> cjk
+LANG_SCRIPTS = {"en": "latin", "es": "latin", "cn": "cjk", "zh": "cjk", "ar": "arabic"}
+
+
+def make_word(i, script="latin"):
+    """Return the ``i``-th word of ``script``; distinct ``i`` give distinct words."""
+    alphabet, min_length, _ = SCRIPTS[script]
+    symbols = []
+    while i or len(symbols) < min_length:
+        i, digit = divmod(i, len(alphabet))
+        symbols.append(alphabet[digit])
+    return "".join(symbols)
+
+
+def join_words(words, script):
+    return SCRIPTS[script][2].join(words)
+
+
+def make_entries(count, source="latin", target="cjk", seed=0):
+    """Return ``{source text: translation}`` with ``count`` entries.
+
+    About half are single words, a third multi-word phrases and the rest
+    whole sentences, so word, phrase and segment lookups are all exercised.
+    """
+    rng = random.Random(seed)
+    vocabulary = max(1000, count // 2)
+    entries = {}
+    n = 0
+    while len(entries) < count:
+        kind = rng.random()
+        if kind < 0.5:
+            ids = [n]
+            n += 1
+        elif kind < 0.8:
+            ids = [rng.randrange(vocabulary) for _ in range(rng.randint(2, 4))]
+        else:
+            ids = [rng.randrange(vocabulary) for _ in range(rng.randint(6, 12))]
+        key = join_words([make_word(i, source) for i in ids], source)
+        if key not in entries:
+            value = join_words([make_word(i * 7 + 3, target) for i in ids], target)
+            entries[key] = value
+    if source == "latin":
+        # 少量首字母大写和带标点的词条，覆盖忽略大小写和标点的选项
+        for key in list(entries)[: count // 20]:
+            value = entries.pop(key)
+            entries[key.capitalize() + rng.choice(["", ":", "."])] = value
+    return entries
+
+
+def write_dictionary(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"translations": entries}, f, ensure_ascii=False)
+
+
+def make_segments(entries, count, source="latin", hit_rate=0.7, seed=0):
+    """Return ``count`` document segments drawn from ``entries``.
+
+    ``hit_rate`` of them are dictionary keys (or, for space-separated
+    scripts, sentences built from dictionary words); the rest are made of
+    words outside the dictionary and stay untranslated.
+    """
+    rng = random.Random(seed)
+    keys = list(entries)
+    separator = SCRIPTS[source][2]
+    words = [key for key in keys if separator and separator not in key]
+    segments = []
+    for _ in range(count):
+        roll = rng.random()
+        if hit_rate / 2 <= roll < hit_rate and words:
+            segments.append(
+                join_words(rng.choices(words, k=rng.randint(3, 10)), source)
+            )
+        elif roll < hit_rate:
+            segments.append(rng.choice(keys))
+        else:
+            unknown = [
+                make_word(10**7 + rng.randrange(10**6), source)
+                for _ in range(rng.randint(2, 8))
+            ]
+            segments.append(join_words(unknown, source))
+    return segments
+
+
+def make_typos(entries, count, seed=0):
+    """Return ``count`` dictionary keys with one letter replaced by another."""
+    rng = random.Random(seed)
+    typos = []
+    for key in rng.sample(list(entries), count):
+        letters = [i for i, c in enumerate(key) if c.isalpha()]
+        i = rng.choice(letters)
+        replacement = rng.choice(
+            [c for c in "abcdefghijklmnopqrstuvwxyz" if c != key[i]]
+        )
+        typos.append(key[:i] + replacement + key[i + 1 :])
+    return typos
+
+
+def make_docx(
+    path,
+    segments,
+    paragraphs=1000,
+    tables=0,
+    table_rows=20,
+    table_cols=5,
+    merged=False,
+    seed=0,
+):
+    """Write a document of ``paragraphs`` body paragraphs and ``tables`` tables.
+
+    Text is taken from ``segments`` in turn. With ``merged`` every table gets
+    horizontally and vertically merged cells, as in scanned transcripts.
+    """
+    rng = random.Random(seed)
+    doc = Document()
+    texts = itertools.cycle(segments)
+    for _ in range(paragraphs):
+        doc.add_paragraph(next(texts))
+    for _ in range(tables):
+        table = doc.add_table(rows=table_rows, cols=table_cols)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = next(texts)
+        if merged and table_rows > 2 and table_cols > 2:
+            for r in range(0, table_rows, 4):
+                table.cell(r, 0).merge(table.cell(r, 1))
+            for c in range(2, table_cols):
+                r = rng.randrange(table_rows - 2)
+                table.cell(r, c).merge(table.cell(r + 2, c))
+        doc.add_paragraph(next(texts))
+    doc.save(path)
+
+
+def language_scripts(language):
+    source, target = language.split("_")[:2]
+    return LANG_SCRIPTS[source], LANG_SCRIPTS[target]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+    dictionary = commands.add_parser("dictionary", help="write a dictionary JSON")
+    dictionary.add_argument("output")
+    dictionary.add_argument("--entries", type=int, default=10000)
+    dictionary.add_argument("-l", "--language", default="en_cn")
+    docx = commands.add_parser("docx", help="write a Word document")
+    docx.add_argument("output")
+    docx.add_argument("--dictionary", required=True, help="dictionary to draw from")
+    docx.add_argument("-l", "--language", default="en_cn")
+    docx.add_argument("--paragraphs", type=int, default=1000)
+    docx.add_argument("--tables", type=int, default=0)
+    docx.add_argument("--table-rows", type=int, default=20)
+    docx.add_argument("--table-cols", type=int, default=5)
+    docx.add_argument("--merged", action="store_true", help="merge table cells")
+    docx.add_argument("--hit-rate", type=float, default=0.7)
+    args = parser.parse_args(argv)
+
+    source, target = language_scripts(args.language)
+    if args.command == "dictionary":
+        entries = make_entries(args.entries, source, target, args.seed)
+        write_dictionary(args.output, entries)
+        print(f"{len(entries)} entries written to {args.output}")
+    else:
+        with open(args.dictionary, "r", encoding="utf-8") as f:
+            entries = json.load(f)["translations"]
+        segments = make_segments(entries, 1000, source, args.hit_rate, args.seed)
+        make_docx(
+            args.output,
+            segments,
+            args.paragraphs,
+            args.tables,
+            args.table_rows,
+            args.table_cols,
+            args.merged,
+            args.seed,
+        )
+        print(f"Document written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
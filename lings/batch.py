@@ -0,0 +1,138 @@
+# batch.py
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from profiling import profiled
+from providers import build_fallback_chain
+from translator import Translator
+
+# 每个工作进程只加载并编译一次词典
+_worker_translator = None
+
+
+def _make_translator(language, category_path, options, fallbacks):
+    # 后备阶段持有模块和连接，不能跨进程传递，按名称在各进程中构建
+    stages = build_fallback_chain(fallbacks or [], language)
+    return Translator(language, category_path, fallbacks=stages, **options)
+
+
+def _init_worker(language, category_path, options, fallbacks=None):
+    global _worker_translator
+    _worker_translator = _make_translator(language, category_path, options, fallbacks)
+
+
+def _translate_one(
+    input_file, output_file, streaming=False, translator=None, profile=None
+):
+    translator = translator or _worker_translator
+    start = time.perf_counter()
+    result = {
+        "input": input_file,
+        "output": output_file,
+        "status": "ok",
+        "untranslated": [],
+        "error": None,
+        "stats": {},
+    }
+    try:
+        with profiled(output_file, profile):
+            if streaming:
+                report = translator.translate_document_streaming(
+                    input_file, output_file
+                )
+            else:
+                report = translator.translate_document(input_file, output_file)
+        result["untranslated"] = report.as_list()
+        result["stats"] = translator.last_stats
+    except Exception as e:  # 单个损坏的文档不能中断整个批次
+        logging.error(f"Failed to translate {input_file}: {e}")
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def translate_batch(
+    jobs,
+    language,
+    category_path,
+    strict_punctuation=True,
+    ignore_case=False,
+    partial_match=False,
+    max_workers=None,
+    use_snapshot=True,
+    streaming=False,
+    fallbacks=None,
+    profile=None,
+):
+    """Translate many ``(input_file, output_file)`` pairs on a process pool.
+
+    Yields one result dict per document as soon as it finishes, with its
+    status, untranslated segments, error message, elapsed seconds and
+    ``stats`` (counters and per-phase timings, see ``Translator.last_stats``).
+    ``max_workers=1`` runs everything in the calling process. With
+    ``use_snapshot`` the workers share one memory-mapped compiled dictionary;
+    ``streaming`` selects the streaming DOCX engine. ``fallbacks`` names the
+    stages tried for segments the dictionary misses (see providers.py).
+    ``profile`` (default: ``LINGS_PROFILE``) saves a cProfile capture next to
+    each output (see profiling.py).
+    """
+    options = {
+        "strict_punctuation": strict_punctuation,
+        "ignore_case": ignore_case,
+        "partial_match": partial_match,
+        "use_snapshot": use_snapshot,
+    }
+    jobs = list(jobs)
+    if not jobs:
+        return
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+
+    if max_workers == 1:
+        translator = _make_translator(language, category_path, options, fallbacks)
+        for input_file, output_file in jobs:
+            yield _translate_one(
+                input_file, output_file, streaming, translator, profile
+            )
+        return
+
+    if fallbacks:
+        build_fallback_chain(fallbacks, language)  # 在启动工作进程前报告配置错误
+    if use_snapshot:
+        # 先在主进程编译好快照，工作进程只需映射同一个文件
+        Translator(language, category_path, **options)
+    logging.info(f"Translating {len(jobs)} documents with {max_workers} workers")
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(language, category_path, options, fallbacks),
+    ) as pool:
+        futures = [
+            pool.submit(
+                _translate_one, input_file, output_file, streaming, None, profile
+            )
+            for input_file, output_file in jobs
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # 调用方提前关闭生成器时，不再等待尚未开始的文档
+            for future in futures:
+                future.cancel()
+
+
+def collect_jobs(input_dir, output_dir, suffix="_translated"):
+    # 将目录中的所有 .docx 映射到输出目录
+    jobs = []
+    for filename in sorted(os.listdir(input_dir)):
+        if filename.endswith(".docx") and not filename.startswith("~$"):
+            name, ext = os.path.splitext(filename)
+            jobs.append(
+                (
+                    os.path.join(input_dir, filename),
+                    os.path.join(output_dir, f"{name}{suffix}{ext}"),
+                )
+            )
+    return jobs
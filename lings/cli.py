@@ -0,0 +1,237 @@
+# cli.py
+"""Headless command-line entry point.
+
+Example::
+
+    python lings/cli.py --category en_cn_passport.json -o out/ --jobs 8 \
+        --summary summary.json transcripts/ "scans/*.docx"
+
+Repeat ``-d``/``-c`` to stack dictionaries; the first one given wins::
+
+    python lings/cli.py -d acme_glossary.json -d data/en_cn_passport.json scans/
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from batch import translate_batch
+from layers import layer_files
+from logutil import PhaseTotals, format_phases
+from providers import build_fallback_chain, configured_fallback_names
+
+DEFAULT_METADATA = os.path.join("data", "translations_metadata.json")
+
+
+def resolve_dictionaries(args):
+    """Return the dictionary paths to stack, highest precedence first."""
+    if args.dictionary:
+        return args.dictionary
+    with open(args.metadata, "r", encoding="utf-8") as f:
+        metadata = json.load(f).get("translations", [])
+    dictionary_dir = args.dictionary_dir or os.path.dirname(args.metadata)
+    paths = []
+    for category in args.category:
+        files = layer_files(metadata, category)
+        if files is None:
+            raise SystemExit(f"Unknown category: {category}")
+        for file in files:
+            path = os.path.join(dictionary_dir, file)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def expand_inputs(patterns, suffix):
+    # 支持单个文件、目录和通配符，跳过已翻译的输出和 Word 临时文件
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.docx"))
+        else:
+            matches = glob.glob(pattern, recursive=True) or [pattern]
+        for path in sorted(matches):
+            name = os.path.basename(path)
+            if name.startswith("~$") or os.path.splitext(name)[0].endswith(suffix):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def build_jobs(files, output_dir, suffix):
+    jobs = []
+    for path in files:
+        name, ext = os.path.splitext(os.path.basename(path))
+        directory = output_dir or os.path.dirname(path)
+        jobs.append((path, os.path.join(directory, f"{name}{suffix}{ext or '.docx'}")))
+    return jobs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lings", description="Translate Word documents with a Lings dictionary."
+    )
+    parser.add_argument("inputs", nargs="+", help=".docx files, directories or globs")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "-d",
+        "--dictionary",
+        action="append",
+        help="path to a dictionary JSON file; repeat to stack dictionaries",
+    )
+    source.add_argument(
+        "-c",
+        "--category",
+        action="append",
+        help="file name or description from translations_metadata.json; "
+        "repeat to stack categories",
+    )
+    parser.add_argument("--metadata", default=DEFAULT_METADATA)
+    parser.add_argument(
+        "--dictionary-dir",
+        help="directory containing category files (default: next to --metadata)",
+    )
+    parser.add_argument(
+        "-l", "--language", help="language pair, e.g. en_cn (default: from file name)"
+    )
+    parser.add_argument(
+        "--no-strict-punctuation",
+        dest="strict_punctuation",
+        action="store_false",
+        help="ignore punctuation when looking up words",
+    )
+    parser.add_argument("--ignore-case", action="store_true")
+    parser.add_argument("--partial-match", action="store_true")
+    parser.add_argument("-o", "--output-dir", help="default: next to each input")
+    parser.add_argument("--suffix", default="_translated")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+    parser.add_argument(
+        "--streaming", action="store_true", help="use the streaming DOCX engine"
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        dest="use_snapshot",
+        action="store_false",
+        help="parse the JSON dictionary instead of the compiled snapshot",
+    )
+    parser.add_argument(
+        "--fallback",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="try 'memory' or an enabled provider plugin for segments the "
+        "dictionary misses; repeat to chain (default: fallback_chain in "
+        "data/plugin_config.json)",
+    )
+    parser.add_argument(
+        "--no-fallback",
+        action="store_true",
+        help="only use the dictionary",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=None,
+        help="save a cProfile capture next to each output (also LINGS_PROFILE=1)",
+    )
+    parser.add_argument(
+        "--summary", help="write a JSON summary to this file ('-' for stdout)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    dictionaries = resolve_dictionaries(args)
+    dictionary = dictionaries if len(dictionaries) > 1 else dictionaries[0]
+    # 词典文件名约定为 <源语言>_<目标语言>_<类别>.json，以最底层的为准
+    name = os.path.splitext(os.path.basename(dictionaries[-1]))[0]
+    language = args.language or "_".join(name.split("_")[:2])
+    files = expand_inputs(args.inputs, args.suffix)
+    if not files:
+        print("No input documents found", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    jobs = build_jobs(files, args.output_dir, args.suffix)
+    fallbacks = [] if args.no_fallback else args.fallback or configured_fallback_names()
+    try:
+        build_fallback_chain(fallbacks, language)
+    except (ValueError, ImportError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    documents = []
+    total_phases = PhaseTotals()
+    for result in translate_batch(
+        jobs,
+        language,
+        dictionary,
+        strict_punctuation=args.strict_punctuation,
+        ignore_case=args.ignore_case,
+        partial_match=args.partial_match,
+        max_workers=args.jobs,
+        use_snapshot=args.use_snapshot,
+        streaming=args.streaming,
+        fallbacks=fallbacks,
+        profile=args.profile,
+    ):
+        untranslated = result["untranslated"]
+        phases = result["stats"].get("phases", {})
+        document_phases = total_phases.add(result["stats"])
+        documents.append(
+            {
+                "input": result["input"],
+                "output": result["output"],
+                "status": result["status"],
+                "error": result["error"],
+                "elapsed": round(result["elapsed"], 4),
+                "untranslated_segments": len(untranslated),
+                "untranslated_occurrences": sum(u["count"] for u in untranslated),
+                "phases": phases,
+            }
+        )
+        status = "ok" if result["status"] == "ok" else f"FAILED ({result['error']})"
+        print(
+            f"[{len(documents)}/{len(jobs)}] {result['input']}: {status}, "
+            f"{len(untranslated)} untranslated, {result['elapsed']:.2f}s",
+            file=sys.stderr,
+        )
+        if document_phases:
+            print(f"    {format_phases(document_phases)}", file=sys.stderr)
+
+    failed = sum(1 for doc in documents if doc["status"] != "ok")
+    summary = {
+        "dictionary": dictionary,
+        "language": language,
+        "options": {
+            "strict_punctuation": args.strict_punctuation,
+            "ignore_case": args.ignore_case,
+            "partial_match": args.partial_match,
+            "streaming": args.streaming,
+            "jobs": args.jobs,
+            "fallbacks": fallbacks,
+        },
+        "documents": documents,
+        "total": len(documents),
+        "succeeded": len(documents) - failed,
+        "failed": failed,
+        "untranslated_segments": sum(d["untranslated_segments"] for d in documents),
+        "phases": total_phases.as_dict(),
+        "elapsed": round(time.perf_counter() - start, 4),
+    }
+    if args.summary == "-":
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=4)
+        print()
+    elif args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,32 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox, ttk
 import json
-import pandas as pd
+import time
+from itertools import islice
+from entrystore import EntryStore
+from search import COLUMNS, SearchIndex
+from treeview import VirtualTreeview
 
 
 class DictionaryEditor:
+    FILTER_SLICE = 0.03  # 每次在主线程中收集过滤结果的最长时间（秒）
+    FILTER_BATCH = 500
+
     def __init__(self, root, file_path):
         self.root = root
         self.root.title("Dictionary Editor")
 
         self.file_path = file_path
-        self.data = pd.DataFrame(columns=["Original", "Translation"])
+        self.store = EntryStore()
+        self.search = SearchIndex(self.store)
+        self.matches = None  # 过滤结果（行 id 列表），None 表示显示全部
+        self.pending_matches = None
+        self.filter_job = None
         self.font_size = tk.IntVar(value=10)
+        self.filter_text = tk.StringVar()
+        self.filter_column = tk.StringVar(value="All")
+        self.filter_prefix = tk.BooleanVar(value=False)
+        self.filter_status = tk.StringVar()
 
         self.create_widgets()
         self.load_dictionary()
@@ -29,8 +44,34 @@ class DictionaryEditor:
             width=50,
         ).grid(row=0, column=1, padx=5, pady=5, sticky="ew")
 
+        tk.Label(frame, text="Filter:").grid(row=1, column=0, sticky="w")
+        filter_frame = tk.Frame(frame)
+        filter_frame.grid(row=1, column=1, columnspan=2, sticky="ew")
+        tk.Entry(filter_frame, textvariable=self.filter_text).pack(
+            side="left", fill="x", expand=True, padx=5, pady=5
+        )
+        filter_column = ttk.Combobox(
+            filter_frame,
+            textvariable=self.filter_column,
+            values=list(COLUMNS),
+            state="readonly",
+            width=12,
+        )
+        filter_column.pack(side="left", padx=5)
+        tk.Checkbutton(
+            filter_frame,
+            text="Starts with",
+            variable=self.filter_prefix,
+            command=self.apply_filter,
+        ).pack(side="left", padx=5)
+        tk.Label(filter_frame, textvariable=self.filter_status).pack(
+            side="left", padx=5
+        )
+        self.filter_text.trace_add("write", self.apply_filter)
+        filter_column.bind("<<ComboboxSelected>>", self.apply_filter)
+
         tree_frame = tk.Frame(frame)
-        tree_frame.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="nsew")
+        tree_frame.grid(row=2, column=0, columnspan=3, padx=5, pady=5, sticky="nsew")
 
         self.tree = ttk.Treeview(
             tree_frame,
@@ -47,7 +88,9 @@ class DictionaryEditor:
         self.hsb = ttk.Scrollbar(
             tree_frame, orient="horizontal", command=self.tree.xview
         )
-        self.tree.configure(yscroll=self.vsb.set, xscroll=self.hsb.set)
+        self.tree.configure(xscroll=self.hsb.set)
+        # 只创建可见行和少量缓冲行，滚动时原地改写
+        self.view = VirtualTreeview(self.tree, self.vsb, self.row_count, self.get_row)
 
         self.vsb.pack(side="right", fill="y")
         self.hsb.pack(side="bottom", fill="x")
@@ -61,7 +104,7 @@ class DictionaryEditor:
         self.tree.bind("<Return>", self.on_return_key)
         self.tree.bind("<Escape>", self.on_escape_key)
 
-        frame.grid_rowconfigure(1, weight=1)
+        frame.grid_rowconfigure(2, weight=1)
         frame.grid_columnconfigure(1, weight=1)
 
         button_frame = tk.Frame(self.root)
@@ -89,23 +132,60 @@ class DictionaryEditor:
     def load_dictionary(self):
         with open(self.file_path, "r", encoding="utf-8") as f:
             data = json.load(f).get("translations", {})
-            self.data = pd.DataFrame(
-                list(data.items()), columns=["Original", "Translation"]
-            )
+        self.store.load(data.items())
+        self.search.rebuild()
+        self.apply_filter()
+
+    def row_count(self):
+        return len(self.store) if self.matches is None else len(self.matches)
+
+    def get_row(self, index):
+        if self.matches is None:
+            return self.store.row(index)
+        return self.store.get(self.matches[index])
+
+    def row_id_at(self, index):
+        if self.matches is None:
+            return self.store.row_id(index)
+        return self.matches[index]
+
+    def apply_filter(self, *args):
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+            self.filter_job = None
+        self.pending_matches = self.search.search(
+            self.filter_text.get(), self.filter_column.get(), self.filter_prefix.get()
+        )
+        self.matches = None if self.pending_matches is None else []
+        self.view.selected_index = None
+        self.view.top = 0
+        if self.pending_matches is None:
+            self.filter_status.set("")
+            self.update_treeview()
+        else:
+            self.collect_matches()
+
+    def collect_matches(self):
+        # 结果按批收集，每次最多占用 FILTER_SLICE 秒，第一屏结果立即显示
+        self.filter_job = None
+        deadline = time.perf_counter() + self.FILTER_SLICE
+        while True:
+            batch = list(islice(self.pending_matches, self.FILTER_BATCH))
+            self.matches.extend(batch)
+            if len(batch) < self.FILTER_BATCH:
+                self.pending_matches = None
+                break
+            if time.perf_counter() >= deadline:
+                break
         self.update_treeview()
+        if self.pending_matches is None:
+            self.filter_status.set(f"{len(self.matches)} matches")
+        else:
+            self.filter_status.set(f"{len(self.matches)}+ matches")
+            self.filter_job = self.root.after(1, self.collect_matches)
 
     def update_treeview(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for i, (_, row) in enumerate(self.data.iterrows()):
-            tags = ("evenrow",) if i % 2 == 0 else ("oddrow",)
-            self.tree.insert(
-                "",
-                "end",
-                iid=i,
-                values=(row["Original"], row["Translation"]),
-                tags=tags,
-            )
+        self.view.refresh()
 
     def update_treeview_style(self):
         font_size = self.font_size.get()
@@ -119,36 +199,44 @@ class DictionaryEditor:
         )
         self.tree.tag_configure("oddrow", background="white")
         self.tree.tag_configure("evenrow", background="lightblue")
+        self.view.refresh()  # 行高变化后重新计算可见行数
 
     def add_entry(self):
         original = simpledialog.askstring("Add Entry", "Enter the original text:")
         translation = simpledialog.askstring("Add Entry", "Enter the translation:")
         if original and translation:
-            new_row = pd.DataFrame(
-                {"Original": [original], "Translation": [translation]}
-            )
-            self.data = pd.concat([self.data, new_row], ignore_index=True)
-            self.update_treeview()
+            row_id = self.store.add(original, translation)
+            self.search.touch(row_id)
+            if self.matches is not None:
+                self.matches.append(row_id)  # 新条目在过滤时也保持可见
+            self.view.select(self.row_count() - 1)
 
     def delete_entry(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            original = self.tree.item(selected_item, "values")[0]
-            self.data = self.data[self.data["Original"] != original]
-            self.update_treeview()
+        index = self.view.selected()
+        if index is not None:
+            row_id = self.row_id_at(index)
+            self.store.delete(self.store.index_of(row_id))
+            self.search.touch(row_id)
+            if self.matches is not None:
+                del self.matches[index]
+            self.view.selected_index = None
+            self.view.refresh()
 
     def save_dictionary(self):
-        data_dict = {
-            row["Original"]: row["Translation"] for _, row in self.data.iterrows()
-        }
+        if not self.store.dirty:
+            messagebox.showinfo("Save Dictionary", "No changes to save.")
+            return
+        data_dict = self.store.to_dict()
         with open(self.file_path, "w", encoding="utf-8") as f:
             json.dump({"translations": data_dict}, f, ensure_ascii=False, indent=4)
+        self.store.mark_clean()
         messagebox.showinfo("Save Dictionary", "Dictionary saved successfully.")
 
     def on_double_click(self, event):
         if not self.tree.selection():
             return
         self.editing_item = self.tree.selection()[0]
+        self.editing_index = self.view.index_of(self.editing_item)
         self.editing_column = self.tree.identify_column(event.x)
         self.start_edit()
 
@@ -175,13 +263,11 @@ class DictionaryEditor:
     def save_edit(self):
         new_value = self.entry_edit.get()
         column = int(self.editing_column[1:]) - 1
-        self.tree.set(self.editing_item, column=column, value=new_value)
-        original = self.tree.item(self.editing_item, "values")[0]
-        self.data.loc[
-            self.data["Original"] == original, self.tree["columns"][column]
-        ] = new_value
+        row_id = self.row_id_at(self.editing_index)
+        if self.store.update(row_id, column, new_value):
+            self.search.touch(row_id)
+        self.view.refresh_row(self.editing_index)  # 只更新被编辑的一行
         self.entry_edit.destroy()
-        self.update_treeview()
 
     def cancel_edit(self):
         self.entry_edit.destroy()
@@ -0,0 +1,293 @@
+# docx_stream.py
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from docx.oxml import parse_xml
+from docx.text.paragraph import Paragraph
+from docx_walk import iter_table_paragraphs
+from lxml import etree
+from report import SegmentReport
+
+WML_NAMESPACE = b"http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+HEADER_FOOTER_PART = re.compile(r"^word/(header|footer)\d*\.xml$")
+CHUNK_SIZE = 1 << 20
+
+_TAG = re.compile(rb"<(/?)([^\s/>!?]+)[^>]*?(/?)>")
+_SPECIAL = re.compile(rb"<(!--.*?--|\?.*?\?|!\[CDATA\[.*?\]\])>", re.S)
+
+
+class _PartReader:
+    """Incremental reader splitting an XML part into top-level body elements."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = bytearray()
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def fill(self):
+        if self.eof:
+            return False
+        data = self.stream.read(CHUNK_SIZE)
+        if not data:
+            self.eof = True
+            return False
+        self.bytes_read += len(data)
+        self.buffer += data
+        return True
+
+    def next_tag(self):
+        # 返回 (start, end, is_close, name, self_closing)，位置相对当前缓冲区
+        while True:
+            lt = self.buffer.find(b"<", self.pos)
+            if lt >= 0:
+                special = _SPECIAL.match(self.buffer, lt)
+                if special:
+                    self.pos = special.end()
+                    continue
+                match = _TAG.match(self.buffer, lt)
+                if match and not self.buffer.startswith((b"<!", b"<?"), lt):
+                    self.pos = match.end()
+                    return (
+                        lt,
+                        match.end(),
+                        bool(match.group(1)),
+                        match.group(2),
+                        bool(match.group(3)),
+                    )
+            if not self.fill():
+                return None
+
+    def take(self, end):
+        data = bytes(self.buffer[:end])
+        del self.buffer[:end]
+        self.pos -= end
+        return data
+
+
+def _wml_prefix(root_tag):
+    for match in re.finditer(rb'xmlns:([\w.\-]+)="([^"]*)"', root_tag):
+        if match.group(2) == WML_NAMESPACE:
+            return match.group(1) + b":"
+    return b"w:"
+
+
+class StreamingDocxRewriter:
+    """Translate a .docx without building the python-docx object model.
+
+    ``word/document.xml`` (and optionally the header/footer parts) is read
+    incrementally and split into top-level body elements; only elements
+    whose paragraphs change are parsed and re-serialized, everything else
+    is copied through unchanged, as are all other zip members.
+    """
+
+    def __init__(self, translator, include_headers_footers=False):
+        self.translator = translator
+        self.include_headers_footers = include_headers_footers
+
+    def rewrite(self, input_file, output_file, progress_callback=None):
+        untranslated_segments = SegmentReport()
+        self.translations = {}  # 按文本去重，同一文本只翻译一次
+        self.paragraph_count = 0
+        self.table_count = 0
+        self.timings = self.translator.timings
+        # 解析、翻译和写回交替进行，各自计时；其余的读写和压缩计入 save
+        # 先写入同目录下的临时文件，成功后再替换，出错时不留下残缺的文档
+        directory, filename = os.path.split(os.path.abspath(output_file))
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{filename}.", suffix=".tmp", dir=directory
+        )
+        os.close(fd)
+        try:
+            with self.timings.phase("save"):
+                self.rewrite_members(
+                    input_file, tmp_path, untranslated_segments, progress_callback
+                )
+            os.replace(tmp_path, output_file)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logging.info(f"Saved translated document: {output_file}")
+        return untranslated_segments
+
+    def rewrite_members(
+        self, input_file, output_file, untranslated_segments, progress_callback
+    ):
+        with zipfile.ZipFile(input_file) as zin, zipfile.ZipFile(
+            output_file, "w", zipfile.ZIP_DEFLATED
+        ) as zout:
+            if self.translator.fallbacks:
+                with self.timings.phase("parse"):
+                    texts = self.collect_texts(zin)
+                with self.timings.phase("translate"):
+                    self.translations = self.translator.translate_texts(texts)
+            for info in zin.infolist():
+                out_info = zipfile.ZipInfo(info.filename, info.date_time)
+                out_info.compress_type = info.compress_type
+                out_info.external_attr = info.external_attr
+                out_info.create_system = info.create_system
+                with zin.open(info) as src, zout.open(out_info, "w") as dst:
+                    if info.filename == "word/document.xml":
+                        self.rewrite_body(
+                            src, dst, untranslated_segments, info, progress_callback
+                        )
+                    elif self.include_headers_footers and HEADER_FOOTER_PART.match(
+                        info.filename
+                    ):
+                        self.rewrite_part(
+                            src, dst, untranslated_segments, info.filename
+                        )
+                    else:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    def iter_body(self, src):
+        """Split ``word/document.xml`` into ``(data, name)`` pieces.
+
+        ``name`` is the tag of a top-level body element, or None for the bytes
+        around them, which are copied through as they are. Also sets the
+        ``wrapper_open``/``wrapper_close`` tags used to parse an element.
+        """
+        reader = self.reader = _PartReader(src)
+        root_tag = None
+        # 第一阶段：原样写出 <w:body> 之前的内容，并记下根元素的命名空间声明
+        while True:
+            tag = reader.next_tag()
+            if tag is None:
+                yield reader.take(len(reader.buffer)), None
+                return
+            start, end, is_close, name, self_closing = tag
+            if root_tag is None and not is_close:
+                root_tag = bytes(reader.buffer[start:end])
+            if name.endswith(b"body") and not is_close and not self_closing:
+                yield reader.take(end), None
+                break
+        prefix = _wml_prefix(root_tag)
+        self.body_tags = (prefix + b"p", prefix + b"tbl")
+        root_name = _TAG.match(root_tag).group(2)
+        self.wrapper_open = (
+            root_tag[:-2] + b">" if root_tag.endswith(b"/>") else root_tag
+        )
+        self.wrapper_close = b"</" + root_name + b">"
+
+        # 第二阶段：逐个处理 body 的直接子元素
+        depth = 0
+        chunk_name = None
+        while True:
+            tag = reader.next_tag()
+            if tag is None:
+                break
+            start, end, is_close, name, self_closing = tag
+            if depth == 0:
+                if is_close:  # </w:body>
+                    break
+                yield reader.take(start), None
+                chunk_name = name
+                end -= start
+                if not self_closing:
+                    depth = 1
+                    continue
+            elif self_closing:
+                continue
+            else:
+                depth += -1 if is_close else 1
+            if depth == 0:
+                yield reader.take(end), chunk_name
+        # 第三阶段：</w:body> 及其后的内容原样写出
+        yield reader.take(len(reader.buffer)), None
+        while reader.fill():
+            yield reader.take(len(reader.buffer)), None
+
+    def rewrite_body(self, src, dst, untranslated_segments, info, progress_callback):
+        pieces = self.iter_body(src)
+        parse = self.timings.phase("parse")
+        while True:
+            with parse:  # 扫描标签、切分元素
+                piece = next(pieces, None)
+            if piece is None:
+                break
+            data, name = piece
+            if name is None:
+                dst.write(data)
+                continue
+            if name in self.body_tags:
+                data = self.translate_chunk(data, untranslated_segments)
+            dst.write(data)
+            if progress_callback and info.file_size:
+                progress_callback(
+                    min(self.reader.bytes_read / info.file_size * 100, 100)
+                )
+
+    def collect_texts(self, zin):
+        # 预先收集所有不同的段落文本，以便把词典未命中的部分一次性交给后备翻译
+        texts = {}
+        with zin.open("word/document.xml") as src:
+            for data, name in self.iter_body(src):
+                if name is not None and name in self.body_tags:
+                    element = parse_xml(self.wrapper_open + data + self.wrapper_close)[
+                        0
+                    ]
+                    if element.tag.endswith("}p"):
+                        paragraphs = [element]
+                    else:
+                        paragraphs = [p for p, _ in iter_table_paragraphs(element, "")]
+                    for p in paragraphs:
+                        texts[Paragraph(p, None).text] = None
+        if self.include_headers_footers:
+            for name in zin.namelist():
+                if HEADER_FOOTER_PART.match(name):
+                    for p in parse_xml(zin.read(name)).xpath(".//w:p"):
+                        texts[Paragraph(p, None).text] = None
+        return [text for text in texts if text.strip()]
+
+    def paragraphs_in_chunk(self, element):
+        # 与 translate_document 一致：正文段落，以及正文表格中每个单元格的段落
+        if element.tag.endswith("}p"):
+            self.paragraph_count += 1
+            yield element, f"paragraph {self.paragraph_count}"
+        else:
+            self.table_count += 1
+            yield from iter_table_paragraphs(element, f"table {self.table_count}")
+
+    def rewrite_paragraph(self, p, report, location):
+        para = Paragraph(p, None)
+        return self.translator.rewrite_paragraph(
+            para, para.text, report, location, self.translations
+        )
+
+    def translate_chunk(self, chunk, untranslated):
+        with self.timings.phase("parse"):
+            wrapper = parse_xml(self.wrapper_open + chunk + self.wrapper_close)
+        modified = False
+        with self.timings.phase("traverse"):
+            for p, location in self.paragraphs_in_chunk(wrapper[0]):
+                if self.rewrite_paragraph(p, untranslated, location):
+                    modified = True
+        if not modified:
+            return chunk
+        with self.timings.phase("write_back"):
+            xml = etree.tostring(wrapper, encoding="utf-8")
+        return xml[xml.index(b">") + 1 : -len(self.wrapper_close)]
+
+    def rewrite_part(self, src, dst, untranslated_segments, part_name):
+        # 页眉页脚体积很小，整体解析即可
+        with self.timings.phase("parse"):
+            root = parse_xml(src.read())
+        modified = False
+        with self.timings.phase("traverse"):
+            for i, p in enumerate(root.xpath(".//w:p"), start=1):
+                location = f"{part_name}, paragraph {i}"
+                if self.rewrite_paragraph(p, untranslated_segments, location):
+                    modified = True
+        if not modified:
+            src.seek(0)
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            return
+        with self.timings.phase("write_back"):
+            xml = etree.tostring(
+                root, encoding="UTF-8", xml_declaration=True, standalone=True
+            )
+        dst.write(xml)
@@ -0,0 +1,39 @@
+# docx_walk.py
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+
+
+def iter_table_paragraphs(tbl, location):
+    """Yield ``(w:p, location)`` for every cell paragraph of a ``w:tbl``.
+
+    Walks the underlying ``w:tc`` elements rather than ``row.cells``, which
+    repeats a merged cell once per grid column it spans, so every cell is
+    visited exactly once. Nested tables are included.
+    """
+    for r, tr in enumerate(tbl.iterchildren(W_TR), start=1):
+        for c, tc in enumerate(tr.iterchildren(W_TC), start=1):
+            cell_location = f"{location}, row {r}, cell {c}"
+            i = n = 0
+            for child in tc.iterchildren(W_P, W_TBL):
+                if child.tag == W_P:
+                    i += 1
+                    yield child, f"{cell_location}, paragraph {i}"
+                else:
+                    n += 1
+                    yield from iter_table_paragraphs(
+                        child, f"{cell_location}, table {n}"
+                    )
+
+
+def iter_document_paragraphs(doc):
+    """Yield ``(Paragraph, location)`` for body paragraphs, then table cells."""
+    for i, para in enumerate(doc.paragraphs, start=1):
+        yield para, f"paragraph {i}"
+    for t, table in enumerate(doc.tables, start=1):
+        for p, location in iter_table_paragraphs(table._tbl, f"table {t}"):
+            yield Paragraph(p, table), location
@@ -0,0 +1,107 @@
+# entrystore.py
+import itertools
+from bisect import bisect_left
+
+
+class EntryStore:
+    """Ordered ``(original, translation)`` rows with stable ids for the editors."""
+
+    def __init__(self, rows=()):
+        self._ids = itertools.count()
+        self.load(rows)
+
+    def load(self, rows):
+        """Replace all rows with ``rows`` and mark the store clean."""
+        self.rows = {}  # 行 id -> [原文, 译文]
+        self.keys = {}  # 原文 -> 行 id 集合（原文可能重复）
+        for original, translation in rows:
+            row_id = next(self._ids)
+            self.rows[row_id] = [original, translation]
+            ids = self.keys.get(original)
+            if ids is None:
+                self.keys[original] = {row_id: None}
+            else:
+                ids[row_id] = None
+        # 显示顺序中的行 id；删除后保持紧凑有序，按位置读取和 index_of 依赖这一点
+        self.order = list(self.rows)
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, row_id):
+        return row_id in self.rows
+
+    def __iter__(self):
+        for row_id in self.order:
+            yield tuple(self.rows[row_id])
+
+    def _insert(self, original, translation):
+        row_id = next(self._ids)
+        self.rows[row_id] = [original, translation]
+        self.order.append(row_id)
+        self.keys.setdefault(original, {})[row_id] = None
+        return row_id
+
+    def row_id(self, index):
+        return self.order[index]
+
+    def index_of(self, row_id):
+        # 新行总是追加在末尾，order 中的行 id 保持递增，可以二分查找
+        index = bisect_left(self.order, row_id)
+        if index == len(self.order) or self.order[index] != row_id:
+            raise KeyError(row_id)
+        return index
+
+    def row(self, index):
+        return tuple(self.rows[self.order[index]])
+
+    def get(self, row_id):
+        return tuple(self.rows[row_id])
+
+    def items(self):
+        """Yield ``(row_id, (original, translation))`` in display order."""
+        for row_id in self.order:
+            yield row_id, tuple(self.rows[row_id])
+
+    def find(self, original):
+        """Return the ids of the rows whose original text is ``original``."""
+        return list(self.keys.get(original, ()))
+
+    def add(self, original, translation=""):
+        row_id = self._insert(original, translation)
+        self.dirty = True
+        return row_id
+
+    def update(self, row_id, column, value):
+        row = self.rows[row_id]
+        if row[column] == value:
+            return False
+        if column == 0:
+            self._unlink(row[0], row_id)
+            self.keys.setdefault(value, {})[row_id] = None
+        row[column] = value
+        self.dirty = True
+        return True
+
+    def delete(self, index):
+        # O(n)，但只是一次内存移动；改用墓碑标记会让之后按位置读取变慢
+        row_id = self.order.pop(index)
+        original, _ = self.rows.pop(row_id)
+        self._unlink(original, row_id)
+        self.dirty = True
+        return row_id
+
+    def _unlink(self, original, row_id):
+        ids = self.keys[original]
+        del ids[row_id]
+        if not ids:
+            del self.keys[original]
+
+    def to_dict(self):
+        # 原文重复时以后出现的译文为准，与逐行写入 dict 的结果一致
+        return {original: translation for original, translation in self}
+
+    def mark_clean(self):
+        # 任何修改都会设置 dirty，行写出后清除
+        self.dirty = False
@@ -0,0 +1,210 @@
+# fuzzy.py
+import heapq
+import re
+from collections import Counter
+from normalization import normalize_text
+
+# 中日韩文字没有空格分词，按相邻两字切分
+_TOKEN = re.compile(r"([぀-ヿ㐀-䶿一-鿿가-힯]+)|(\w+)")
+
+
+def tokenize(text):
+    tokens = set()
+    for cjk, word in _TOKEN.findall(text):
+        if word:
+            tokens.add(word)
+        elif len(cjk) == 1:
+            tokens.add(cjk)
+        else:
+            tokens.update(cjk[i : i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def trigrams(token):
+    padded = f" {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_dist):
+    """Levenshtein distance, or ``max_dist + 1`` as soon as it must exceed it.
+
+    Only the diagonal band of width ``2 * max_dist + 1`` is computed.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    la, lb = len(a), len(b)
+    if lb - la > max_dist:
+        return max_dist + 1
+    inf = max_dist + 1
+    previous = [j if j <= max_dist else inf for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        lo = max(1, i - max_dist)
+        hi = min(lb, i + max_dist)
+        current = [inf] * (lb + 1)
+        current[0] = best = i if i <= max_dist else inf
+        for j in range(lo, hi + 1):
+            value = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] < value:
+                value = previous[j] + 1
+            if current[j - 1] < value:
+                value = current[j - 1] + 1
+            current[j] = value
+            if value < best:
+                best = value
+        if best > max_dist:
+            return inf
+        previous = current
+    return min(previous[lb], inf)
+
+
+def similarity(a, b, min_score=0.0):
+    """Normalized edit similarity in [0, 1]; 0.0 when it is below ``min_score``."""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    max_dist = int((1 - min_score) * longest)
+    distance = edit_distance(a, b, max_dist)
+    if distance > max_dist:
+        return 0.0
+    return 1 - distance / longest
+
+
+def ranked(counts, head):
+    # 通常前 head 个就够用，用不完时才对全部排序
+    top = counts.most_common(head)
+    for entry, _ in top:
+        yield entry
+    if len(top) < len(counts):
+        for entry, _ in counts.most_common()[len(top) :]:
+            yield entry
+
+
+class FuzzyIndex:
+    """Find dictionary entries similar to a segment, for TM-style suggestions.
+
+    Entries are indexed by word tokens (character bigrams for CJK runs), so
+    building is linear in the dictionary size. A query gathers candidates
+    that share its rarer tokens; tokens missing from the vocabulary (typos,
+    new names) are matched to similar vocabulary words through a trigram
+    index that is built on first use. Only the ``CANDIDATES`` best-sharing
+    candidates within the length bounds are verified with a banded edit
+    distance, so a lookup never scans the whole dictionary.
+    """
+
+    CANDIDATES = 10
+    MAX_POSTINGS = 10000  # 更常见的词只在没有更少见的词时用于召回
+    SIMILAR_TOKENS = 3
+    SIMILAR_CANDIDATES = 50  # 按共享三元组数预选后再计算相似度的词数
+
+    def __init__(self, entries=None):
+        self.sources = []
+        self.keys = []
+        self.translations = []
+        self.entry_ids = {}
+        self.postings = {}
+        self._vocab_grams = None
+        if entries:
+            for source, translation in entries.items():
+                self.add(source, translation)
+
+    def __len__(self):
+        return len(self.sources)
+
+    @staticmethod
+    def normalize(text):
+        return normalize_text(text, casefold=True)
+
+    def add(self, source, translation):
+        entry = self.entry_ids.get(source)
+        if entry is not None:
+            self.translations[entry] = translation
+            return
+        key = self.normalize(source)
+        if not key:
+            return
+        entry = self.entry_ids[source] = len(self.sources)
+        self.sources.append(source)
+        self.keys.append(key)
+        self.translations.append(translation)
+        for token in tokenize(key):
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = [entry]
+                if self._vocab_grams is not None:
+                    self.add_vocab(token)
+            else:
+                ids.append(entry)
+
+    def add_vocab(self, token):
+        if len(token) >= 4 and token.isalpha():
+            for gram in trigrams(token):
+                self._vocab_grams.setdefault(gram, []).append(token)
+
+    def similar_tokens(self, token):
+        if len(token) < 4 or not token.isalpha():
+            return []
+        if self._vocab_grams is None:
+            self._vocab_grams = {}
+            for vocab_token in self.postings:
+                self.add_vocab(vocab_token)
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._vocab_grams.get(gram, ()))
+        # 三元组的 Dice 系数 2c/(a+b) 作为相似度，取最接近的几个词。
+        # 只给共享最多的几十个词打分；达到 0.5 至少要共享 a/3 个三元组
+        least = len(grams) / 3
+        scored = [
+            (2 * count / (len(grams) + len(trigrams(other))), other)
+            for other, count in shared.most_common(self.SIMILAR_CANDIDATES)
+            if count >= least
+        ]
+        return [
+            other
+            for score, other in heapq.nlargest(self.SIMILAR_TOKENS, scored)
+            if score >= 0.5
+        ]
+
+    def lookup(self, text, min_score=0.7):
+        """Return ``(score, source, translation)`` of the best match, or None."""
+        key = self.normalize(text)
+        if not key:
+            return None
+        lists = []
+        for token in tokenize(key):
+            ids = self.postings.get(token)
+            if ids is not None:
+                lists.append(ids)
+            else:
+                lists.extend(self.postings[t] for t in self.similar_tokens(token))
+        if not lists:
+            return None
+        lists.sort(key=len)
+        shared = Counter(lists[0])
+        budget = self.MAX_POSTINGS - len(lists[0])
+        for ids in lists[1:]:
+            budget -= len(ids)
+            if budget < 0:
+                break
+            shared.update(ids)
+
+        length = len(key)
+        lo, hi = length * min_score, length / min_score
+        keys = self.keys
+        best = None
+        checked = 0
+        # 共享词最多的候选优先，只验证前几个长度合适的
+        for entry in ranked(shared, self.CANDIDATES * 10):
+            if not lo <= len(keys[entry]) <= hi:
+                continue
+            # 已找到的最好分数作为下限，后面的候选可以更早放弃
+            score = similarity(key, keys[entry], best[0] if best else min_score)
+            if score >= min_score and (best is None or score > best[0]):
+                best = (score, self.sources[entry], self.translations[entry])
+                if score == 1.0:
+                    break
+            checked += 1
+            if checked == self.CANDIDATES:
+                break
+        return best
@@ -3,21 +3,34 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
 import json
 import logging
-from translator import Translator
-from dicmanager import DictionaryManager  # 导入词典管理器
-from plugin_manager import PluginManager  # 导入插件管理器
-from texteditor import TextEditor, open_editor  # 导入文本编辑器
 import os
+import queue
+from jobs import BatchTranslationJob, TranslationJob
+from layers import layer_files
+from logutil import PhaseTotals, document_phases, format_phases, setup_logging
 
 # 配置日志记录
-logging.basicConfig(
-    filename="translation.log",
-    level=logging.INFO,
-    format="%(asctime)s:%(levelname)s:%(message)s",
-)
+setup_logging()
+
+# 翻译器、编辑器、管理器和插件在首次使用时才导入（texteditor 会引入 python-docx），
+# 以缩短主窗口的启动时间
+
+
+def get_translator(*args, **kwargs):
+    from registry import get_translator  # 共享词典注册表
+
+    return get_translator(*args, **kwargs)
+
+
+def open_editor(*args, **kwargs):
+    from texteditor import open_editor  # 导入文本编辑器
+
+    return open_editor(*args, **kwargs)
 
 
 class TranslationApp:
+    POLL_INTERVAL_MS = 100  # 进度刷新频率
+
     def __init__(self, root):
         self.root = root
         self.root.title("Word Document Translator")
@@ -31,6 +44,8 @@ class TranslationApp:
         self.ignore_case = tk.BooleanVar(value=False)
         self.partial_match = tk.BooleanVar(value=False)
         self.selected_category_path = tk.StringVar(value="")
+        self.status_text = tk.StringVar(value="")
+        self.job = None
 
         self.metadata = self.load_metadata()
         self.create_widgets()
@@ -69,14 +84,17 @@ class TranslationApp:
 
     def set_category(self, category):
         self.category_var.set(category)
-        category_file = next(
-            (item["file"] for item in self.metadata if item["description"] == category),
-            None,
-        )
-        if category_file:
-            category_path = os.path.join("translations", category_file)
-            self.selected_category_path.set(category_path)
-            logging.info(f"Selected category file: {category_path}")
+        category_paths = self.selected_category_paths()
+        if category_paths:
+            self.selected_category_path.set(" > ".join(category_paths))
+            logging.info(f"Selected category files: {category_paths}")
+
+    def selected_category_paths(self):
+        # 元数据中的 layers 是叠在所选词典之下的其他词典，所选词典优先
+        files = layer_files(self.metadata, self.category_var.get())
+        if not files:
+            return None
+        return [os.path.join("translations", file) for file in files]
 
     def create_widgets(self):
         tk.Label(self.root, text="Language (e.g., en_cn):").grid(
@@ -107,9 +125,10 @@ class TranslationApp:
         tk.Button(self.root, text="Load Word File", command=self.load_file).grid(
             row=4, column=0, padx=10, pady=10
         )
-        tk.Button(self.root, text="Add Translation", command=self.add_translation).grid(
-            row=4, column=1, padx=10, pady=10
+        self.add_button = tk.Button(
+            self.root, text="Add Translation", command=self.add_translation
         )
+        self.add_button.grid(row=4, column=1, padx=10, pady=10)
 
         tk.Label(self.root, text="Strict punctuation:").grid(
             row=5, column=0, padx=10, pady=10
@@ -137,10 +156,18 @@ class TranslationApp:
             self.root, orient="horizontal", length=200, mode="determinate"
         )
         self.progress.grid(row=8, column=0, columnspan=3, padx=10, pady=10)
+        tk.Label(self.root, textvariable=self.status_text).grid(
+            row=14, column=0, columnspan=3, padx=10, pady=10
+        )  # 进度、速度与剩余时间
 
-        tk.Button(
+        self.translate_button = tk.Button(
             self.root, text="Translate Document", command=self.translate_document
-        ).grid(row=9, column=0, columnspan=3, padx=10, pady=10)
+        )
+        self.translate_button.grid(row=9, column=0, columnspan=2, padx=10, pady=10)
+        self.cancel_button = tk.Button(
+            self.root, text="Cancel", command=self.cancel_translation, state="disabled"
+        )
+        self.cancel_button.grid(row=9, column=2, padx=10, pady=10)  # 取消后台翻译
         tk.Button(
             self.root, text="Manage Dictionaries", command=self.open_dictionary_manager
         ).grid(
@@ -154,6 +181,12 @@ class TranslationApp:
         tk.Button(self.root, text="Edit Document", command=self.open_text_editor).grid(
             row=12, column=0, columnspan=3, padx=10, pady=10
         )  # 添加文档编辑按钮
+        self.folder_button = tk.Button(
+            self.root, text="Translate Folder", command=self.translate_folder
+        )
+        self.folder_button.grid(
+            row=13, column=0, columnspan=3, padx=10, pady=10
+        )  # 批量翻译整个文件夹
 
     def load_file(self):
         self.input_file = filedialog.askopenfilename(
@@ -165,24 +198,21 @@ class TranslationApp:
             logging.info(f"Loaded file: {self.input_file}")
 
     def add_translation(self):
+        if self.job:
+            # 后台任务正在使用共享的 Translator，此时修改或重新加载词典会与之竞争
+            messagebox.showerror("Error", "Wait for the translation to finish")
+            return
         word = simpledialog.askstring(
             "Input", "Enter the word or paragraph to translate:"
         )
         translation = simpledialog.askstring("Input", "Enter the translation:")
         if word and translation:
-            category_file = next(
-                (
-                    item["file"]
-                    for item in self.metadata
-                    if item["description"] == self.category_var.get()
-                ),
-                None,
-            )
-            if category_file:
-                category_path = os.path.join("translations", category_file)
-                translator = Translator(
+            category_paths = self.selected_category_paths()
+            if category_paths:
+                # 新词条写入所选词典（最上层）
+                translator = get_translator(
                     self.language_var.get(),
-                    category_path,
+                    category_paths,
                     self.strict_punctuation.get(),
                     self.ignore_case.get(),
                     self.partial_match.get(),
@@ -202,57 +232,194 @@ class TranslationApp:
             defaultextension=".docx", filetypes=[("Word files", "*.docx")]
         )
         if output_file:
-            category_file = next(
-                (
-                    item["file"]
-                    for item in self.metadata
-                    if item["description"] == self.category_var.get()
-                ),
-                None,
-            )
-            if not category_file:
+            category_paths = self.selected_category_paths()
+            if not category_paths:
                 messagebox.showerror("Error", "No category selected")
                 logging.error("No category selected")
                 return
-            category_path = os.path.join("translations", category_file)
-            translator = Translator(
+            from providers import configured_fallback_chain
+
+            # 词典未命中的段落按插件配置中的 fallback_chain 交给翻译记忆或机器翻译
+            translator = get_translator(
                 self.language_var.get(),
-                category_path,
+                category_paths,
                 self.strict_punctuation.get(),
                 self.ignore_case.get(),
                 self.partial_match.get(),
+                fallbacks=configured_fallback_chain(self.language_var.get()),
             )
 
-            def update_progress(value):
-                self.progress["value"] = value
-                self.root.update_idletasks()
-
-            untranslated_segments = translator.translate_document(
-                self.input_file, output_file, update_progress
+            # 在后台线程中翻译，主线程只负责定时刷新进度
+            # 未翻译的段落附带词典中最相近词条的译文，供编辑器预填
+            self.job = TranslationJob(
+                translator, self.input_file, output_file, suggest=True
             )
+            self.start_job(self.poll_translation)
+
+    def start_job(self, poll):
+        # 同一时间只运行一个后台任务，单个文档和文件夹共用取消按钮；
+        # 任务运行期间不能添加词条，以免在翻译中途修改共享的词典和索引
+        self.translate_button.config(state="disabled")
+        self.add_button.config(state="disabled")
+        self.folder_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.status_text.set("Starting...")
+        self.job.start()
+        self.root.after(self.POLL_INTERVAL_MS, poll)
+
+    def finish_job(self):
+        self.job = None
+        self.translate_button.config(state="normal")
+        self.add_button.config(state="normal")
+        self.folder_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        self.progress["value"] = 0  # 重置进度条
+        self.status_text.set("")
+
+    def cancel_translation(self):
+        if self.job:
+            self.job.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status_text.set("Cancelling...")
+
+    def poll_translation(self):
+        job = self.job
+        finished = None
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                _, percent, elapsed, segments = event
+                self.progress["value"] = percent
+                rate = segments / elapsed if elapsed else 0
+                eta = elapsed * (100 - percent) / percent if percent else 0
+                self.status_text.set(
+                    f"{percent:.0f}%  {rate:.0f} segments/s  ETA {eta:.0f}s"
+                )
+            else:
+                finished = event
+        if finished is None:
+            self.root.after(self.POLL_INTERVAL_MS, self.poll_translation)
+            return
+
+        self.finish_job()
+        if finished[0] == "cancelled":
+            messagebox.showinfo("Info", "Translation cancelled")
+        elif finished[0] == "error":
+            messagebox.showerror("Error", f"Translation failed: {finished[1]}")
+        else:
+            _, untranslated_segments, elapsed, stats = finished
+            # 在状态栏保留各阶段耗时，便于判断慢在哪里
+            breakdown = format_phases(document_phases(stats))
+            self.status_text.set(f"Done in {elapsed:.2f}s: {breakdown}")
+            logging.info(f"Translated {job.input_file} in {elapsed:.2f}s: {breakdown}")
             if untranslated_segments:
                 result = messagebox.askyesno(
                     "Edit Translations",
                     "Some segments were not translated. Would you like to edit them?",
                 )
                 if result:
-                    open_editor(untranslated_segments, output_file)
+                    open_editor(untranslated_segments, job.output_file)
             else:
                 messagebox.showinfo(
-                    "Info", f"Translated document saved as: {output_file}"
+                    "Info", f"Translated document saved as: {job.output_file}"
                 )
-                logging.info(f"Translated document saved as: {output_file}")
-            self.progress["value"] = 0  # 重置进度条
+                logging.info(f"Translated document saved as: {job.output_file}")
+
+    def translate_folder(self):
+        category_paths = self.selected_category_paths()
+        if not category_paths:
+            messagebox.showerror("Error", "No category selected")
+            logging.error("No category selected")
+            return
+        input_dir = filedialog.askdirectory(title="Select folder with Word files")
+        if not input_dir:
+            return
+        output_dir = filedialog.askdirectory(title="Select output folder")
+        if not output_dir:
+            return
+        from batch import collect_jobs
+        from providers import configured_fallback_names
+
+        jobs = collect_jobs(input_dir, output_dir)
+        if not jobs:
+            messagebox.showerror("Error", "No Word files found in folder")
+            return
+
+        # 与单个文档一样在后台线程中翻译，主线程定时汇总结果
+        self.job = BatchTranslationJob(
+            jobs,
+            self.language_var.get(),
+            category_paths,
+            strict_punctuation=self.strict_punctuation.get(),
+            ignore_case=self.ignore_case.get(),
+            partial_match=self.partial_match.get(),
+            fallbacks=configured_fallback_names(),
+        )
+        self.batch_done = 0
+        self.batch_failed = []
+        self.batch_untranslated = 0
+        self.batch_phases = PhaseTotals()
+        self.start_job(self.poll_batch)
+
+    def poll_batch(self):
+        job = self.job
+        finished = None
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                _, done, total, result = event
+                self.batch_done = done
+                if result["status"] != "ok":
+                    self.batch_failed.append(os.path.basename(result["input"]))
+                self.batch_untranslated += len(result["untranslated"])
+                self.batch_phases.add(result["stats"])
+                self.progress["value"] = done / total * 100
+                self.status_text.set(f"{done} of {total} documents")
+            else:
+                finished = event
+        if finished is None:
+            self.root.after(self.POLL_INTERVAL_MS, self.poll_batch)
+            return
+
+        self.finish_job()
+        if finished[0] == "error":  # 例如 fallback_chain 配置错误
+            messagebox.showerror("Error", f"Batch translation failed: {finished[1]}")
+            return
+        failed = self.batch_failed
+        summary = (
+            f"Translated {self.batch_done - len(failed)} of {len(job.jobs)} documents, "
+            f"{self.batch_untranslated} untranslated segments."
+        )
+        if finished[0] == "cancelled":
+            summary = "Cancelled. " + summary
+        if failed:
+            summary += "\nFailed: " + ", ".join(failed)
+        if self.batch_phases:
+            summary += "\nTime by phase: " + self.batch_phases.format()
+        messagebox.showinfo("Batch Translation", summary)
+        logging.info(summary)
 
     def open_dictionary_manager(self):
+        from dicmanager import DictionaryManager  # 导入词典管理器
+
         manager_root = tk.Toplevel(self.root)
         DictionaryManager(manager_root)
 
     def open_plugin_manager(self):
+        from plugin_manager import PluginManager  # 导入插件管理器
+
         manager_root = tk.Toplevel(self.root)
         PluginManager(manager_root)
 
     def open_text_editor(self):
+        from texteditor import TextEditor  # 导入文本编辑器
+
         editor_root = tk.Toplevel(self.root)
         TextEditor(editor_root, file_path=self.input_file)
 
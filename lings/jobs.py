@@ -0,0 +1,180 @@
+# jobs.py
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from profiling import profiled
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class BackgroundJob(threading.Thread):
+    """Daemon thread that posts events to ``self.events`` and can be cancelled."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.events = queue.Queue()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+
+class TranslationJob(BackgroundJob):
+    """Run ``Translator.translate_document`` off the Tk main thread.
+
+    Events are posted to ``self.events`` for the GUI to poll:
+    ``("progress", percent, elapsed, segments)`` at most every
+    ``REPORT_INTERVAL`` seconds, then exactly one of ``("done", report,
+    elapsed, stats)``, ``("cancelled",)`` or ``("error", message)``, where
+    ``stats`` is ``Translator.last_stats`` with the per-phase timings. The document
+    is written to a temporary file and only moved over ``output_file`` once
+    translation has finished, so a cancelled job leaves nothing behind.
+    With ``suggest`` set, untranslated segments in the report also carry
+    fuzzy dictionary suggestions (see ``Translator.suggest_translations``).
+    ``profile`` (default: the ``LINGS_PROFILE`` environment variable) saves a
+    cProfile capture next to ``output_file``, see profiling.py.
+    ``translator`` is not locked: its dictionaries must not be changed or
+    reloaded until the job has finished.
+    """
+
+    REPORT_INTERVAL = 0.1
+
+    def __init__(
+        self, translator, input_file, output_file, suggest=False, profile=None
+    ):
+        super().__init__()
+        self.translator = translator
+        self.input_file = input_file
+        self.output_file = output_file
+        self.suggest = suggest
+        self.profile = profile
+
+    def run(self):
+        start = time.perf_counter()
+        last_report = 0.0
+        directory, filename = os.path.split(os.path.abspath(self.output_file))
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{filename}.", suffix=".tmp", dir=directory
+        )
+        os.close(fd)
+
+        def on_progress(percent):
+            nonlocal last_report
+            if self.cancelled:
+                raise JobCancelled()
+            now = time.perf_counter()
+            if now - last_report >= self.REPORT_INTERVAL or percent >= 100:
+                last_report = now
+                self.events.put(
+                    (
+                        "progress",
+                        percent,
+                        now - start,
+                        self.translator.counters.segments,
+                    )
+                )
+
+        try:
+            with profiled(self.output_file, self.profile):
+                report = self.translator.translate_document(
+                    self.input_file, tmp_path, on_progress
+                )
+                stats = self.translator.last_stats
+                if self.suggest and report and not self.cancelled:
+                    self.translator.suggest_translations(report)
+            if self.cancelled:
+                raise JobCancelled()
+            os.replace(tmp_path, self.output_file)
+            self.events.put(("done", report, time.perf_counter() - start, stats))
+        except JobCancelled:
+            logging.info(f"Cancelled translation of {self.input_file}")
+            self.events.put(("cancelled",))
+        except Exception as e:
+            logging.error(f"Failed to translate {self.input_file}: {e}")
+            self.events.put(("error", f"{type(e).__name__}: {e}"))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class BatchTranslationJob(BackgroundJob):
+    """Run ``batch.translate_batch`` over ``jobs`` off the Tk main thread.
+
+    Posts ``("progress", done, total, result)`` for every finished document,
+    then ``("done", elapsed)``, ``("cancelled",)`` or ``("error", message)``.
+    ``options`` are passed on to ``translate_batch``. Cancelling stops before
+    the next document; documents already being translated are finished.
+    """
+
+    def __init__(self, jobs, language, category_path, **options):
+        super().__init__()
+        self.jobs = list(jobs)
+        self.language = language
+        self.category_path = category_path
+        self.options = options
+
+    def run(self):
+        from batch import translate_batch  # 会引入 python-docx，不在启动时导入
+
+        start = time.perf_counter()
+        results = translate_batch(
+            self.jobs, self.language, self.category_path, **self.options
+        )
+        try:
+            for done, result in enumerate(results, start=1):
+                self.events.put(("progress", done, len(self.jobs), result))
+                if self.cancelled:
+                    raise JobCancelled()
+            self.events.put(("done", time.perf_counter() - start))
+        except JobCancelled:
+            results.close()  # 取消尚未开始的文档
+            logging.info("Cancelled batch translation")
+            self.events.put(("cancelled",))
+        except Exception as e:  # 包括 fallback_chain 配置错误
+            logging.error(f"Batch translation failed: {e}")
+            self.events.put(("error", f"{type(e).__name__}: {e}"))
+
+
+class MachineTranslationJob(BackgroundJob):
+    """Machine-translate ``texts`` off the Tk main thread.
+
+    ``iter_translations(texts, target_lang)`` is a plugin generator that yields
+    ``[(index, translation), ...]`` per finished request. Each batch is posted
+    as ``("progress", pairs, done, total)`` so the GUI can fill rows in as
+    they arrive, followed by ``("done", done, elapsed)``, ``("cancelled",)``
+    or ``("error", message)``.
+    """
+
+    def __init__(self, iter_translations, texts, target_lang):
+        super().__init__()
+        self.iter_translations = iter_translations
+        self.texts = texts
+        self.target_lang = target_lang
+
+    def run(self):
+        start = time.perf_counter()
+        done = 0
+        translations = self.iter_translations(self.texts, self.target_lang)
+        try:
+            for pairs in translations:
+                if self.cancelled:
+                    raise JobCancelled()
+                done += len(pairs)
+                self.events.put(("progress", pairs, done, len(self.texts)))
+            self.events.put(("done", done, time.perf_counter() - start))
+        except JobCancelled:
+            translations.close()  # 取消尚未发出的请求
+            logging.info(f"Cancelled machine translation after {done} texts")
+            self.events.put(("cancelled",))
+        except Exception as e:
+            logging.error(f"Machine translation failed: {e}")
+            self.events.put(("error", f"{type(e).__name__}: {e}"))
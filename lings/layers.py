@@ -0,0 +1,78 @@
+# layers.py
+from collections import ChainMap
+
+
+class LayeredDict(ChainMap):
+    """Stack of dictionaries looked up in order; the first layer that has a key wins.
+
+    Nothing is merged or copied: lookups try each layer in turn, iteration
+    skips keys shadowed by an earlier layer, and writes go to the first
+    (top) layer, as with ``collections.ChainMap``.
+    """
+
+    def __getitem__(self, key):
+        for mapping in self.maps:
+            value = mapping.get(key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # 热路径：每层一次查找，不先判断是否存在
+        for mapping in self.maps:
+            value = mapping.get(key)
+            if value is not None:
+                return value
+        return default
+
+    def __iter__(self):
+        for depth, mapping in enumerate(self.maps):
+            upper = self.maps[:depth]
+            for key in mapping:
+                if not any(key in layer for layer in upper):
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def layer_of(self, key):
+        """Index of the layer that provides ``key``, or None."""
+        for depth, mapping in enumerate(self.maps):
+            if key in mapping:
+                return depth
+        return None
+
+
+class LayeredPhrases:
+    """Per-layer phrase tables with the ``TokenTrie`` lookup interface.
+
+    The longest phrase found in any layer wins; on equal length the upper
+    layer's translation is used.
+    """
+
+    def __init__(self, maps):
+        self.maps = maps
+
+    def __len__(self):
+        return sum(len(phrases) for phrases in self.maps)
+
+    def longest_match(self, tokens, start=0):
+        best = None
+        for phrases in self.maps:
+            if phrases:
+                match = phrases.longest_match(tokens, start)
+                if match and (best is None or match[0] > best[0]):
+                    best = match
+        return best
+
+
+def layer_files(metadata, category):
+    """Files of ``category`` (a metadata file name or description), top first.
+
+    A metadata entry may list ``"layers"``: further dictionary files stacked
+    beneath it, e.g. a client glossary over a domain and a general dictionary.
+    """
+    for item in metadata:
+        if category in (item["file"], item["description"]):
+            return [item["file"], *item.get("layers", [])]
+    return None
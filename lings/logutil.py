@@ -0,0 +1,229 @@
+# logutil.py
+import atexit
+import itertools
+import logging
+import multiprocessing.util
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s:%(levelname)s:%(message)s"
+
+_listener = None
+_queue_handler = None
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every ``sample_every`` records below WARNING."""
+
+    def __init__(self, sample_every=1):
+        super().__init__()
+        self.sample_every = max(1, int(sample_every))
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.sample_every == 1:
+            return True
+        return next(self._counter) % self.sample_every == 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    ``QueueHandler.prepare`` formats every record on the calling thread so
+    that it can be pickled; this queue never leaves the process, so the
+    record is passed on as is.
+    """
+
+    def prepare(self, record):
+        # 参数在监听线程中才格式化，调用方不应在记录后修改可变参数
+        return record
+
+
+def setup_logging(filename="translation.log", level=logging.INFO, sample_every=None):
+    """Send log records through a queue to a background file writer.
+
+    Callers only pay for putting the record on a queue; formatting and file
+    I/O happen on the listener thread. ``sample_every`` (or the
+    ``LINGS_LOG_SAMPLE`` environment variable) thins out INFO/DEBUG records.
+    Calling this more than once is a no-op.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    if sample_every is None:
+        sample_every = os.environ.get("LINGS_LOG_SAMPLE", 1)
+
+    file_handler = logging.FileHandler(filename, encoding="utf-8", delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    _queue_handler = queue_handler
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)  # 退出前写完队列中剩余的日志
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_in_child():
+    # fork 出的子进程（如批量翻译的工作进程）没有后台线程，需重新启动
+    global _listener
+    if _listener is None:
+        return
+    handler = _listener.handlers[0]
+    sample_filter = _queue_handler.filters[0]
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    # multiprocessing 的子进程以 os._exit 退出，不会执行 atexit
+    multiprocessing.util.Finalize(None, _stop_listener, exitpriority=0)
+    sample_filter._counter = itertools.count()
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
+class TranslationCounters:
+    """Aggregate hot-path counters, reported once per document."""
+
+    FIELDS = (
+        "segments",
+        "segment_hits",
+        "words",
+        "hits",
+        "partial_hits",
+        "misses",
+        "fallback_hits",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def snapshot(self):
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def add(self, delta):
+        for field, value in zip(self.FIELDS, delta):
+            setattr(self, field, getattr(self, field) + value)
+
+    def as_dict(self):
+        return dict(zip(self.FIELDS, self.snapshot()))
+
+    def __repr__(self):
+        return " ".join(f"{k}={v}" for k, v in self.as_dict().items())
+
+
+class PhaseTimer:
+    """Wall time per translation phase, reported with the counters.
+
+    Phases nest: while an inner phase runs, the time goes to it and not to
+    the enclosing one, so the phases add up to the time spent in them.
+    ``phase(name)`` returns a reusable context manager; ``start``/``stop``
+    do the same without one.
+    """
+
+    PHASES = ("load_dictionary", "parse", "traverse", "translate", "write_back", "save")
+    DOCUMENT_PHASES = PHASES[1:]
+
+    def __init__(self):
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self._stack = []
+        self._since = 0.0
+        self._contexts = {}
+
+    def reset(self, names=DOCUMENT_PHASES):
+        # 词典加载时间保留到下一次加载，每个文档只重置文档相关的阶段
+        for name in names:
+            self.times[name] = 0.0
+
+    def start(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self.times[self._stack[-1]] += now - self._since
+        self._stack.append(name)
+        self._since = now
+
+    def stop(self):
+        now = time.perf_counter()
+        self.times[self._stack.pop()] += now - self._since
+        self._since = now
+
+    def phase(self, name):
+        context = self._contexts.get(name)
+        if context is None:
+            context = self._contexts[name] = _Phase(self, name)
+        return context
+
+    def as_dict(self):
+        return {name: round(seconds, 6) for name, seconds in self.times.items()}
+
+    def __repr__(self):
+        return " ".join(f"{k}={v:.3f}s" for k, v in self.times.items())
+
+
+class _Phase:
+    __slots__ = ("timer", "name")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer.start(self.name)
+
+    def __exit__(self, *exc_info):
+        self.timer.stop()
+
+
+def format_phases(phases, total=None):
+    """One-line breakdown such as ``parse 0.12s (10%), translate 0.80s (67%)``."""
+    total = total or sum(phases.values()) or 1
+    return ", ".join(
+        f"{name.replace('_', ' ')} {seconds:.2f}s ({seconds / total:.0%})"
+        for name, seconds in phases.items()
+        if seconds >= 0.005
+    )
+
+
+def document_phases(stats):
+    """The per-document phases of a translation result's ``stats``."""
+    phases = stats.get("phases", {})
+    return {name: phases[name] for name in PhaseTimer.DOCUMENT_PHASES if name in phases}
+
+
+class PhaseTotals:
+    """Per-document phase times summed over a batch, for the CLI and GUI summaries."""
+
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, stats):
+        # 词典每个进程只加载一次，合计时只累加文档相关的阶段
+        phases = document_phases(stats)
+        for name, seconds in phases.items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+        return phases
+
+    def __bool__(self):
+        return bool(self.totals)
+
+    def format(self):
+        return format_phases(self.totals)
+
+    def as_dict(self):
+        return {name: round(seconds, 4) for name, seconds in self.totals.items()}
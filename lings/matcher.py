@@ -0,0 +1,167 @@
+# matcher.py
+from collections import deque
+
+
+class AhoCorasick:
+    """Multi-pattern matcher, built once per dictionary.
+
+    Finds every key in a single pass over the text and resolves overlaps
+    leftmost-longest, the same way a human reader would pick terms.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._length = [0]  # 终止节点对应的模式长度，0 表示非终止
+        self._dict_link = [-1]  # 沿失败链最近的终止节点
+        self._values = {}
+        self._built = False
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, pattern, value):
+        if not pattern or pattern in self._values:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._length.append(0)
+                self._dict_link.append(-1)
+            node = nxt
+        self._length[node] = len(pattern)
+        self._values[pattern] = value
+        self._built = False
+
+    def build(self):
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            self._dict_link[nxt] = -1
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = fail
+                self._dict_link[nxt] = (
+                    fail if self._length[fail] else self._dict_link[fail]
+                )
+                queue.append(nxt)
+        self._built = True
+        return self
+
+    def iter_matches(self, text):
+        """Yield all ``(start, end, pattern)`` occurrences, overlapping included."""
+        if not self._built:
+            self.build()
+        goto, fail, length, dict_link = (
+            self._goto,
+            self._fail,
+            self._length,
+            self._dict_link,
+        )
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            out = node if length[node] else dict_link[node]
+            while out > 0:
+                start = i + 1 - length[out]
+                yield start, i + 1, text[start : i + 1]
+                out = dict_link[out]
+
+    def find_all(self, text):
+        """Return non-overlapping matches chosen leftmost-longest."""
+        longest = {}
+        for start, end, pattern in self.iter_matches(text):
+            if end > longest.get(start, (start, None))[0]:
+                longest[start] = (end, pattern)
+        matches = []
+        pos = 0
+        for start in sorted(longest):
+            if start < pos:
+                continue
+            end, pattern = longest[start]
+            matches.append((start, end, pattern))
+            pos = end
+        return matches
+
+    def replace(self, text, source=None):
+        """Replace every leftmost-longest match, returning ``(text, count)``.
+
+        ``source`` is an optional string aligned character-for-character
+        with ``text`` (e.g. the un-casefolded original); unmatched spans are
+        copied from it so that they keep their original form.
+        """
+        matches = self.find_all(text)
+        if not matches:
+            return text if source is None else source, 0
+        if source is not None and len(source) == len(text):
+            text = source
+        parts = []
+        pos = 0
+        for start, end, pattern in matches:
+            parts.append(text[pos:start])
+            parts.append(self._values[pattern])
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts), len(matches)
+
+
+class TokenTrie:
+    """Trie over token sequences for greedy longest-match phrase lookup."""
+
+    _VALUE = None  # 节点中存放译文的键，不会与任何词元冲突
+
+    def __init__(self):
+        self.root = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, tokens, value, replace=False):
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if self._VALUE not in node:
+            self._size += 1
+        elif not replace:
+            return
+        node[self._VALUE] = value
+
+    def longest_match(self, tokens, start=0):
+        """Return ``(end, value)`` for the longest phrase at ``start``, or None."""
+        node = self.root
+        best = None
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if self._VALUE in node:
+                best = (i + 1, node[self._VALUE])
+        return best
+
+    def prefix_matches(self, tokens, start=0):
+        """Yield ``(end, value)`` for every phrase at ``start``, shortest first.
+
+        ``tokens`` may be any sequence, e.g. a string when the trie was
+        filled with strings character by character.
+        """
+        node = self.root
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if self._VALUE in node:
+                yield i + 1, node[self._VALUE]
@@ -0,0 +1,313 @@
+# mtcache.py
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join("data", "mt_cache.sqlite3")
+MAX_ENTRIES = 500000
+MAX_AGE_DAYS = 180
+EVICT_EVERY = 1000  # 每写入这么多条检查一次是否需要淘汰
+QUERY_CHUNK = 500  # 单条 SQL 中的最多参数个数
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    provider TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    options TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    confirmed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, source, target_lang, options)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used);
+"""
+
+
+def options_key(options):
+    return json.dumps(options or {}, sort_keys=True, ensure_ascii=False)
+
+
+class MTCache:
+    """On-disk cache of machine translations, shared across runs and processes.
+
+    Entries are keyed by provider, source text, target language and the
+    provider options. Entries unused for ``max_age_days`` are dropped, and the
+    least recently used ones once there are more than ``max_entries``.
+    Results the user kept are marked with ``confirm()`` and can be exported
+    into a Lings dictionary with ``export_dictionary()``.
+    """
+
+    def __init__(
+        self, path=DEFAULT_PATH, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 批量翻译在后台线程中进行，连接由锁保护
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.evict()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def get_many(self, provider, texts, target_lang, options=None):
+        """Return ``{text: translation}`` for the cached ``texts``."""
+        key = options_key(options)
+        texts = list(dict.fromkeys(texts))
+        found = {}
+        with self._lock, self.conn:
+            for i in range(0, len(texts), QUERY_CHUNK):
+                chunk = texts[i : i + QUERY_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                found.update(
+                    self.conn.execute(
+                        "SELECT source, translation FROM translations"
+                        " WHERE provider = ? AND target_lang = ? AND options = ?"
+                        f" AND source IN ({marks})",
+                        (provider, target_lang, key, *chunk),
+                    )
+                )
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE provider = ?"
+                    " AND source = ? AND target_lang = ? AND options = ?",
+                    [(now, provider, text, target_lang, key) for text in found],
+                )
+        return found
+
+    def get_confirmed_many(self, texts, target_lang):
+        """Return ``{text: translation}`` of confirmed results from any provider."""
+        texts = list(dict.fromkeys(texts))
+        found = {}
+        with self._lock:
+            for i in range(0, len(texts), QUERY_CHUNK):
+                chunk = texts[i : i + QUERY_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                found.update(
+                    self.conn.execute(
+                        "SELECT source, translation FROM translations"
+                        " WHERE target_lang = ? AND confirmed = 1"
+                        f" AND source IN ({marks}) ORDER BY created",
+                        (target_lang, *chunk),
+                    )
+                )
+        return found
+
+    def get(self, provider, text, target_lang, options=None):
+        return self.get_many(provider, [text], target_lang, options).get(text)
+
+    def put_many(self, provider, pairs, target_lang, options=None):
+        """Store ``(text, translation)`` pairs, keeping an existing confirmation."""
+        key = options_key(options)
+        now = time.time()
+        rows = [
+            (provider, text, target_lang, key, translation, now, now)
+            for text, translation in pairs
+            if translation is not None
+        ]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO translations (provider, source, target_lang, options,"
+                " translation, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (provider, source, target_lang, options) DO UPDATE SET"
+                " confirmed = confirmed AND translation = excluded.translation,"
+                " translation = excluded.translation, last_used = excluded.last_used",
+                rows,
+            )
+            self._writes += len(rows)
+        if self._writes >= EVICT_EVERY:
+            self.evict()
+
+    def confirm(self, provider, pairs, target_lang, options=None):
+        """Mark cached results the user kept unchanged; returns how many matched."""
+        key = options_key(options)
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "UPDATE translations SET confirmed = 1 WHERE provider = ?"
+                " AND source = ? AND target_lang = ? AND options = ?"
+                " AND translation = ?",
+                [
+                    (provider, text, target_lang, key, translation)
+                    for text, translation in pairs
+                ],
+            )
+            return self.conn.total_changes - before
+
+    def evict(self):
+        with self._lock, self.conn:
+            self._writes = 0
+            self.conn.execute(
+                "DELETE FROM translations WHERE last_used < ?",
+                (time.time() - self.max_age,),
+            )
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM translations"
+                    " WHERE (provider, source, target_lang, options) IN"
+                    " (SELECT provider, source, target_lang, options"
+                    " FROM translations ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                logging.info(f"Evicted {excess} machine translations from {self.path}")
+
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    "provider": provider,
+                    "target_lang": target_lang,
+                    "entries": entries,
+                    "confirmed": confirmed,
+                }
+                for provider, target_lang, entries, confirmed in self.conn.execute(
+                    "SELECT provider, target_lang, COUNT(*), SUM(confirmed)"
+                    " FROM translations GROUP BY provider, target_lang"
+                )
+            ]
+
+    def export_dictionary(
+        self,
+        json_path,
+        provider=None,
+        target_lang=None,
+        confirmed_only=True,
+        overwrite=False,
+    ):
+        """Merge cached results into the Lings dictionary at ``json_path``.
+
+        Existing dictionary entries are kept unless ``overwrite`` is set.
+        Returns the number of entries added or changed.
+        """
+        query = "SELECT source, translation FROM translations WHERE 1"
+        params = []
+        if provider:
+            query += " AND provider = ?"
+            params.append(provider)
+        if target_lang:
+            query += " AND target_lang = ?"
+            params.append(target_lang)
+        if confirmed_only:
+            query += " AND confirmed = 1"
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY created", params).fetchall()
+
+        data = {"translations": {}}
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        entries = data.setdefault("translations", {})
+        changed = 0
+        for source, translation in rows:
+            if entries.get(source) == translation:
+                continue
+            if source in entries and not overwrite:
+                continue
+            entries[source] = translation
+            changed += 1
+        if changed:
+            tmp_path = f"{json_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, json_path)
+        logging.info(f"Exported {changed} machine translations to {json_path}")
+        return changed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide cache, or None when disabled.
+
+    The location comes from ``LINGS_MT_CACHE``; set it to an empty string to
+    turn caching off.
+    """
+    global _cache
+    path = os.environ.get("LINGS_MT_CACHE", DEFAULT_PATH)
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            _cache = MTCache(path)
+        return _cache
+
+
+def _reset_in_child():
+    # fork 出的工作进程不能沿用父进程的 sqlite 连接，首次使用时重新打开。
+    # 继承的连接只保留引用而不关闭：子进程关闭它可能检查点并删除父进程仍在用的 WAL
+    global _cache, _cache_lock
+    if _cache is not None:
+        _inherited.append(_cache)
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+_inherited = []
+os.register_at_fork(after_in_child=_reset_in_child)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Inspect the machine-translation cache."
+    )
+    parser.add_argument(
+        "--cache", default=os.environ.get("LINGS_MT_CACHE") or DEFAULT_PATH
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="entries per provider and language")
+    commands.add_parser("evict", help="drop expired entries now")
+    export = commands.add_parser("export", help="merge results into a dictionary")
+    export.add_argument("dictionary", help="Lings dictionary JSON file")
+    export.add_argument("--provider")
+    export.add_argument("-l", "--target-lang")
+    export.add_argument(
+        "--all",
+        dest="confirmed_only",
+        action="store_false",
+        help="include unconfirmed results",
+    )
+    export.add_argument(
+        "--overwrite", action="store_true", help="replace existing entries"
+    )
+    args = parser.parse_args(argv)
+
+    cache = MTCache(args.cache)
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), ensure_ascii=False, indent=4))
+    elif args.command == "evict":
+        cache.evict()
+    else:
+        changed = cache.export_dictionary(
+            args.dictionary,
+            args.provider,
+            args.target_lang,
+            args.confirmed_only,
+            args.overwrite,
+        )
+        print(f"{changed} entries written to {args.dictionary}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# normalization.py
+import unicodedata
+
+
+def fold_text(text, casefold=False):
+    # NFC + 可选的大小写折叠，不改变标点和空白
+    if not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+    if casefold:
+        text = text.casefold()
+    return text
+
+
+def normalize_text(text, casefold=False, strip_punctuation=False):
+    """Normalize a dictionary key or a query the same way.
+
+    Applies NFC, optional casefolding and punctuation stripping, and
+    collapses runs of whitespace, so that keys and lookups meet in the
+    middle regardless of trailing spaces or case differences.
+    """
+    text = fold_text(text, casefold)
+    if strip_punctuation:
+        text = "".join(ch for ch in text if ch.isalnum() or ch.isspace())
+    return " ".join(text.split())
@@ -3,9 +3,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
-import importlib
 import os
 import logging
+from providers import PLUGIN_CONFIG, import_plugin, is_imported, load_plugin_config
 
 
 class PluginManager:
@@ -16,12 +16,9 @@ class PluginManager:
         self.create_widgets()
 
     def load_plugins(self):
-        with open("plugins/plugin_config.json", "r") as file:
-            config = json.load(file)
-        plugins = config["plugins"]
-        for plugin in plugins:
-            plugin["module"] = importlib.import_module(plugin["module"])
-        return plugins
+        # 只读取配置，插件模块在启用时才导入
+        self.config = load_plugin_config()
+        return self.config["plugins"]
 
     def create_widgets(self):
         self.tree = ttk.Treeview(self.root, columns=("Name", "Status"), show="headings")
@@ -41,12 +38,13 @@ class PluginManager:
         for plugin in self.plugins:
             if plugin["name"] == plugin_name:
                 if plugin["enabled"]:
-                    plugin["module"].deactivate()
+                    if is_imported(plugin):  # 从未使用过的插件无需导入再停用
+                        import_plugin(plugin).deactivate()
                     plugin["enabled"] = False
                     self.tree.item(selected_item, values=(plugin_name, "Disabled"))
                     logging.info(f"Disabled plugin {plugin_name}")
                 else:
-                    plugin["module"].activate()
+                    import_plugin(plugin).activate()
                     plugin["enabled"] = True
                     self.tree.item(selected_item, values=(plugin_name, "Enabled"))
                     logging.info(f"Enabled plugin {plugin_name}")
@@ -54,16 +52,16 @@ class PluginManager:
                 break
 
     def save_plugins(self):
-        config = {"plugins": []}
-        for plugin in self.plugins:
-            config["plugins"].append(
-                {
-                    "name": plugin["name"],
-                    "module": plugin["module"].__name__,
-                    "enabled": plugin["enabled"],
-                }
-            )
-        with open("data/plugin_config.json", "w") as file:
+        config = dict(self.config)  # 保留 fallback_chain 等其他设置
+        config["plugins"] = [
+            {
+                "name": plugin["name"],
+                "module": plugin["module"],
+                "enabled": plugin["enabled"],
+            }
+            for plugin in self.plugins
+        ]
+        with open(PLUGIN_CONFIG, "w") as file:
             json.dump(config, file, indent=4)
 
 
@@ -0,0 +1,146 @@
+# plugins/deepl_stub.py
+"""Local stand-in for the DeepL ``/v2/translate`` endpoint.
+
+Run it and point the plugin at it to exercise batching, retries and
+concurrency offline::
+
+    python lings/plugins/deepl_stub.py --port 8765 --fail-rate 0.2 --latency 0.1
+    DEEPL_API_URL=http://127.0.0.1:8765/v2/translate poetry run python lings/gui.py
+
+Every text is "translated" to ``[<TARGET_LANG>] <text>``.
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MAX_TEXTS_PER_REQUEST = 50
+MAX_REQUEST_BYTES = 128 * 1024
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            self.handle_translate()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def handle_translate(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        if self.path != "/v2/translate":
+            return self.send_json(404, {"message": "Not found"})
+        if not self.headers.get("Authorization", "").startswith("DeepL-Auth-Key "):
+            return self.send_json(403, {"message": "Authorization failed"})
+        if length > MAX_REQUEST_BYTES:
+            return self.send_json(413, {"message": "Request entity too large"})
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        texts = form.get("text", [])
+        target_lang = form.get("target_lang", [""])[0]
+        if not texts or not target_lang:
+            return self.send_json(400, {"message": "Missing text or target_lang"})
+        if len(texts) > MAX_TEXTS_PER_REQUEST:
+            return self.send_json(413, {"message": "Too many texts"})
+        with server.lock:
+            server.max_texts = max(server.max_texts, len(texts))
+            server.max_bytes = max(server.max_bytes, length)
+            # fail_next 中的状态码按顺序先于随机失败返回，便于测试重试
+            status = server.fail_next.pop(0) if server.fail_next else None
+
+        time.sleep(server.latency)
+        if status is None and random.random() < server.fail_rate:
+            status = random.choice([429, 503])
+        if status is not None:
+            return self.send_json(
+                status,
+                {"message": "Injected failure"},
+                {"Retry-After": str(server.retry_after)},
+            )
+        with server.lock:
+            server.texts += len(texts)
+        translations = [
+            {"detected_source_language": "EN", "text": f"[{target_lang}] {text}"}
+            for text in texts
+        ]
+        self.send_json(200, {"translations": translations})
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+def make_server(host="127.0.0.1", port=0, fail_rate=0.0, latency=0.0, retry_after=0):
+    """Create the stub server; ``port=0`` picks a free port (see ``server_port``).
+
+    Injected failures carry ``Retry-After: <retry_after>``. Append status codes
+    to ``server.fail_next`` to fail the next requests deterministically. The
+    server counts requests and translated texts, and records the highest
+    concurrency (``max_active``), texts per request (``max_texts``) and
+    request body size (``max_bytes``) it has seen.
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.fail_rate = fail_rate
+    server.latency = latency
+    server.retry_after = retry_after
+    server.fail_next = []
+    server.lock = threading.Lock()
+    server.requests = server.texts = server.active = server.max_active = 0
+    server.max_texts = server.max_bytes = 0
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline DeepL API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--fail-rate", type=float, default=0.0, help="share of 429/503 responses"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=int,
+        default=0,
+        help="Retry-After seconds sent with injected failures",
+    )
+    args = parser.parse_args(argv)
+    server = make_server(
+        args.host, args.port, args.fail_rate, args.latency, args.retry_after
+    )
+    print(
+        f"DeepL stub listening on http://{args.host}:{server.server_port}/v2/translate"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{server.requests} requests, {server.texts} texts translated")
+
+
+if __name__ == "__main__":
+    main()
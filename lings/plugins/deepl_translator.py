@@ -1,10 +1,45 @@
 # plugins/deepl_translator.py
 
-import requests
 import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote_plus
+import requests
+from requests.adapters import HTTPAdapter
+from mtcache import get_cache
+
+# 可用环境变量覆盖，例如指向本地桩服务器：
+# DEEPL_API_URL=http://127.0.0.1:8765/v2/translate
+DEEPL_API_URL = os.environ.get(
+    "DEEPL_API_URL", "https://api-free.deepl.com/v2/translate"
+)
+DEEPL_API_KEY = os.environ.get("DEEPL_API_KEY", "API")
 
-DEEPL_API_URL = "https://api-free.deepl.com/v2/translate"
-DEEPL_API_KEY = "API"
+MAX_TEXTS_PER_REQUEST = 50  # DeepL 每个请求最多 50 条文本
+MAX_REQUEST_BYTES = 120 * 1024  # 请求体上限为 128 KiB，留出余量
+MAX_WORKERS = 4  # 同时进行的请求数
+TIMEOUT = (5, 30)  # 连接、读取超时（秒）
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_STATUS = {429, 500, 502, 503, 504, 529}
+PROVIDER = "deepl"  # 机器翻译缓存中的提供方名称
+
+# 翻译服务插件约定，见 providers.py
+CAPABILITIES = {
+    "name": "DeepL",
+    "kind": "mt",
+    "batch": True,
+    "max_batch_size": MAX_TEXTS_PER_REQUEST,
+    "network": True,
+    "target_langs": None,
+}
+
+_session = None
+_session_lock = threading.Lock()
 
 
 def activate():
@@ -17,15 +52,154 @@ def deactivate():
     logging.info("DeepL Translator deactivated")
 
 
-def translate_text(text, target_lang="EN"):
+def get_session():
+    # 所有请求共用一个连接池，连接数与并发数一致
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Authorization"] = f"DeepL-Auth-Key {DEEPL_API_KEY}"
+            _session = session
+        return _session
+
+
+def iter_batches(texts):
+    """Yield lists of indices into ``texts`` that fit in one request."""
+    batch, size = [], 0
+    for i, text in enumerate(texts):
+        text_size = len(quote_plus(text)) + 6  # "&text="
+        if batch and (
+            len(batch) >= MAX_TEXTS_PER_REQUEST or size + text_size > MAX_REQUEST_BYTES
+        ):
+            yield batch
+            batch, size = [], 0
+        batch.append(i)
+        size += text_size
+    if batch:
+        yield batch
+
+
+def retry_delay(attempt, response=None):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), BACKOFF_MAX)
+    # 指数退避加随机抖动，避免并发请求同时重试
+    return min(BACKOFF_BASE * 2**attempt, BACKOFF_MAX) * random.uniform(0.5, 1)
+
+
+def post_batch(texts, target_lang, source_lang=None):
+    """Translate one request's worth of texts, retrying on 429/5xx and timeouts."""
+    data = [("text", text) for text in texts]
+    data.append(("target_lang", target_lang))
+    if source_lang:
+        data.append(("source_lang", source_lang))
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            response = session.post(DEEPL_API_URL, data=data, timeout=TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return [t["text"] for t in response.json()["translations"]]
+            error = requests.HTTPError(
+                f"{response.status_code} from DeepL", response=response
+            )
+        if attempt == MAX_RETRIES:
+            raise error
+        delay = retry_delay(attempt, response)
+        logging.warning(f"DeepL request failed ({error}), retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def iter_translations(texts, target_lang="EN", source_lang=None, max_workers=None):
+    """Translate ``texts`` in batched, concurrent requests.
+
+    Yields ``[(index, translation), ...]`` per finished request, in completion
+    order; ``translation`` is None when the request failed for good. Each
+    distinct text is sent once, and texts found in the machine-translation
+    cache are yielded first without a request. Closing the generator early
+    cancels the requests that have not started yet.
+    """
+    positions = {}
+    for i, text in enumerate(texts):
+        positions.setdefault(text, []).append(i)
+    unique = list(positions)
+    options = {"source_lang": source_lang} if source_lang else {}
+    cache = get_cache()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS)
     try:
-        response = requests.post(
-            DEEPL_API_URL,
-            data={"auth_key": DEEPL_API_KEY, "text": text, "target_lang": target_lang},
-        )
-        response.raise_for_status()
-        result = response.json()
-        return result["translations"][0]["text"]
-    except requests.RequestException as e:
-        logging.error(f"Error translating text: {e}")
-        return None
+        if cache is not None:
+            cached = cache.get_many(PROVIDER, unique, target_lang, options)
+            if cached:
+                yield [
+                    (i, translation)
+                    for text, translation in cached.items()
+                    for i in positions[text]
+                ]
+                unique = [text for text in unique if text not in cached]
+        futures = {
+            executor.submit(
+                post_batch, [unique[i] for i in batch], target_lang, source_lang
+            ): batch
+            for batch in iter_batches(unique)
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                translations = future.result()
+            except (requests.RequestException, KeyError, ValueError) as e:
+                logging.error(f"Error translating {len(batch)} texts: {e}")
+                translations = [None] * len(batch)
+            else:
+                if cache is not None:
+                    cache.put_many(
+                        PROVIDER,
+                        zip((unique[u] for u in batch), translations),
+                        target_lang,
+                        options,
+                    )
+            yield [
+                (i, translation)
+                for u, translation in zip(batch, translations)
+                for i in positions[unique[u]]
+            ]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def translate_batch(
+    texts, target_lang="EN", source_lang=None, max_workers=None, progress_callback=None
+):
+    """Translate ``texts`` and return the translations in order (None on failure).
+
+    ``progress_callback(done, total)`` is called after every request.
+    """
+    results = [None] * len(texts)
+    done = 0
+    for pairs in iter_translations(texts, target_lang, source_lang, max_workers):
+        for i, translation in pairs:
+            results[i] = translation
+        done += len(pairs)
+        if progress_callback:
+            progress_callback(done, len(texts))
+    return results
+
+
+def translate_text(text, target_lang="EN"):
+    return translate_batch([text], target_lang)[0]
+
+
+def confirm_translations(pairs, target_lang="EN", source_lang=None):
+    """Mark ``(text, translation)`` pairs the user kept, for dictionary export."""
+    cache = get_cache()
+    if cache is None:
+        return 0
+    options = {"source_lang": source_lang} if source_lang else {}
+    return cache.confirm(PROVIDER, pairs, target_lang, options)
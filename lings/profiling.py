@@ -0,0 +1,51 @@
+# profiling.py
+"""Opt-in cProfile capture for translation runs.
+
+Set ``LINGS_PROFILE=1`` (or pass ``profile=True``, ``--profile`` on the
+command line) and every translated document gets two files next to it:
+``<output>.prof`` in pstats format, for ``python -m pstats`` or snakeviz,
+and ``<output>.prof.txt`` listing the top functions by cumulative time.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+from contextlib import contextmanager
+
+PROFILE_ENV = "LINGS_PROFILE"
+TOP_FUNCTIONS = 40
+
+
+def profile_enabled(profile=None):
+    if profile is not None:
+        return profile
+    return os.environ.get(PROFILE_ENV, "").lower() not in ("", "0", "false", "no")
+
+
+@contextmanager
+def profiled(output_file, profile=None):
+    """Profile the block and dump the result next to ``output_file`` if enabled."""
+    if not profile_enabled(profile):
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        dump_profile(profiler, output_file)
+
+
+def dump_profile(profiler, output_file):
+    path = f"{output_file}.prof"
+    profiler.dump_stats(path)
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    with open(f"{path}.txt", "w", encoding="utf-8") as f:
+        f.write(text.getvalue())
+    logging.info(f"Saved profile to {path}")
+    return path
@@ -0,0 +1,139 @@
+# providers.py
+"""Translation-provider plugins and the Translator fallback chain.
+
+A provider plugin is a module listed in ``data/plugin_config.json`` that, in
+addition to ``activate()``/``deactivate()``, defines::
+
+    CAPABILITIES = {
+        "name": "DeepL",          # shown in logs and reports
+        "kind": "mt",             # "mt" (machine translation) or "tm" (memory)
+        "batch": True,            # translate_batch sends many texts per call
+        "max_batch_size": 50,     # texts per underlying request
+        "network": True,          # needs network access / may cost quota
+        "target_langs": None,     # supported target languages, None for any
+    }
+
+    def translate_batch(texts, target_lang="EN", source_lang=None):
+        # one result per text, None where the provider has no translation
+        ...
+
+Plugin modules are imported only when they are enabled and first used.
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+from mtcache import get_cache
+
+PLUGIN_CONFIG = os.path.join("data", "plugin_config.json")
+
+# 语言对中的代码与 DeepL 等服务使用的代码不完全一致
+LANG_CODES = {"cn": "ZH"}
+
+
+def provider_langs(language):
+    """Map a Lings language pair such as ``en_cn`` to ``("EN", "ZH")``."""
+    codes = [LANG_CODES.get(code, code.upper()) for code in language.lower().split("_")]
+    if len(codes) < 2:
+        return None, codes[0]
+    return codes[0], codes[1]
+
+
+def load_plugin_config(path=PLUGIN_CONFIG):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_imported(plugin):
+    return plugin["module"] in sys.modules
+
+
+def import_plugin(plugin):
+    # 只在插件启用并首次使用时才导入模块
+    return importlib.import_module(plugin["module"])
+
+
+def is_provider(module):
+    return callable(getattr(module, "translate_batch", None)) and isinstance(
+        getattr(module, "CAPABILITIES", None), dict
+    )
+
+
+class ProviderStage:
+    """Fallback stage backed by an enabled provider plugin."""
+
+    def __init__(self, module, target_lang, source_lang=None):
+        self.module = module
+        self.capabilities = module.CAPABILITIES
+        self.name = self.capabilities.get("name", module.__name__)
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+
+    def translate_batch(self, texts):
+        supported = self.capabilities.get("target_langs")
+        if supported is not None and self.target_lang not in supported:
+            logging.warning(f"{self.name} does not support {self.target_lang}")
+            return [None] * len(texts)
+        return self.module.translate_batch(texts, self.target_lang, self.source_lang)
+
+
+class MemoryStage:
+    """Fallback stage returning exact matches from confirmed earlier results."""
+
+    name = "memory"
+
+    def __init__(self, target_lang):
+        self.target_lang = target_lang
+
+    def translate_batch(self, texts):
+        cache = get_cache()
+        if cache is None:
+            return [None] * len(texts)
+        found = cache.get_confirmed_many(texts, self.target_lang)
+        return [found.get(text) for text in texts]
+
+
+def build_fallback_chain(names, language, config_path=PLUGIN_CONFIG):
+    """Build the stages that follow the dictionary, in order.
+
+    ``names`` are ``"memory"`` or the name or module of an enabled provider
+    plugin from the plugin config.
+    """
+    source_lang, target_lang = provider_langs(language)
+    plugins = None
+    stages = []
+    for name in names:
+        if name == "memory":
+            stages.append(MemoryStage(target_lang))
+            continue
+        if plugins is None:
+            plugins = load_plugin_config(config_path)["plugins"]
+        plugin = next((p for p in plugins if name in (p["name"], p["module"])), None)
+        if plugin is None:
+            raise ValueError(f"Unknown translation provider: {name}")
+        if not plugin["enabled"]:
+            raise ValueError(f"Translation provider is disabled: {name}")
+        module = import_plugin(plugin)
+        if not is_provider(module):
+            raise ValueError(f"Plugin {name} is not a translation provider")
+        stages.append(ProviderStage(module, target_lang, source_lang))
+    return stages
+
+
+def configured_fallback_names(config_path=PLUGIN_CONFIG):
+    try:
+        return load_plugin_config(config_path).get("fallback_chain", [])
+    except OSError:
+        return []
+
+
+def configured_fallback_chain(language, config_path=PLUGIN_CONFIG):
+    """Build the chain listed under ``fallback_chain`` in the plugin config."""
+    try:
+        names = configured_fallback_names(config_path)
+        return build_fallback_chain(names, language, config_path)
+    except (OSError, ValueError, ImportError) as e:
+        logging.error(f"Ignoring fallback chain: {e}")
+        return []
@@ -0,0 +1,165 @@
+# registry.py
+import atexit
+import json
+import logging
+import os
+import threading
+import weakref
+from translator import Translator
+
+
+class Dictionary:
+    """A dictionary file loaded once and shared by all Translator views.
+
+    Additions update every live view in place and are written back to disk
+    after ``save_delay`` seconds of quiet, so a burst of edits costs one
+    serialization instead of one per entry.
+    """
+
+    def __init__(self, path, save_delay=1.0):
+        self.path = path
+        self.save_delay = save_delay
+        self.entries = {}
+        self.mtime_ns = None
+        self.dirty = False
+        self.views = weakref.WeakSet()
+        self._lock = threading.RLock()
+        self._timer = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("translations", {})
+            self.mtime_ns = os.stat(self.path).st_mtime_ns
+            logging.info(f"Loaded word dictionary from {self.path}")
+        except FileNotFoundError:
+            logging.error(f"Word dictionary file {self.path} not found")
+            self.entries = {}
+            self.mtime_ns = None
+
+    def changed_on_disk(self):
+        try:
+            return os.stat(self.path).st_mtime_ns != self.mtime_ns
+        except FileNotFoundError:
+            return self.mtime_ns is not None
+
+    def reload_if_changed(self):
+        with self._lock:
+            # 有未写盘的修改时保留内存中的版本
+            if self.dirty or not self.changed_on_disk():
+                return False
+            self.load()
+            for view in list(self.views):
+                view.word_dict = view.load_word_dict()
+            logging.info(f"Reloaded word dictionary {self.path} after external change")
+            return True
+
+    def add_view(self, translator):
+        self.views.add(translator)
+
+    def add_translation(self, word, translation):
+        with self._lock:
+            self.entries[word] = translation
+            for view in list(self.views):
+                view.update_index(word, translation, view.dictionaries.index(self))
+            self.dirty = True
+            self.schedule_save()
+        logging.info(f"Added translation: {word} -> {translation}")
+
+    def schedule_save(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.save_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"translations": self.entries}, f, ensure_ascii=False, indent=4
+                )
+            os.replace(tmp_path, self.path)
+            self.mtime_ns = os.stat(self.path).st_mtime_ns
+            self.dirty = False
+        logging.info(f"Saved word dictionary to {self.path}")
+
+
+class DictionaryRegistry:
+    """Keeps each dictionary loaded once and hands out shared Translators."""
+
+    def __init__(self, save_delay=1.0):
+        self.save_delay = save_delay
+        self.dictionaries = {}
+        self.translators = {}
+        self._lock = threading.Lock()
+
+    def get_dictionary(self, path):
+        key = os.path.abspath(path)
+        with self._lock:
+            dictionary = self.dictionaries.get(key)
+            if dictionary is None:
+                dictionary = Dictionary(path, self.save_delay)
+                self.dictionaries[key] = dictionary
+        dictionary.reload_if_changed()
+        return dictionary
+
+    def get_translator(
+        self,
+        language,
+        category_path,
+        strict_punctuation=True,
+        ignore_case=False,
+        partial_match=False,
+        fallbacks=None,
+    ):
+        # category_path 可以是按优先级排列的多个词典，每个词典仍只加载一次
+        if isinstance(category_path, (list, tuple)):
+            paths = list(category_path)
+        else:
+            paths = [category_path]
+        dictionaries = [self.get_dictionary(path) for path in paths]
+        key = (
+            tuple(os.path.abspath(path) for path in paths),
+            language,
+            strict_punctuation,
+            ignore_case,
+            partial_match,
+            tuple(stage.name for stage in fallbacks or ()),
+        )
+        with self._lock:
+            translator = self.translators.get(key)
+            if translator is None:
+                translator = Translator(
+                    language,
+                    paths,
+                    strict_punctuation,
+                    ignore_case,
+                    partial_match,
+                    dictionary=dictionaries,
+                    fallbacks=fallbacks,
+                )
+                for dictionary in dictionaries:
+                    dictionary.add_view(translator)
+                self.translators[key] = translator
+        return translator
+
+    def flush_all(self):
+        for dictionary in list(self.dictionaries.values()):
+            dictionary.flush()
+
+
+# 进程内默认注册表，退出前写回所有未保存的修改
+registry = DictionaryRegistry()
+atexit.register(registry.flush_all)
+
+
+def get_translator(language, category_path, *args, **kwargs):
+    return registry.get_translator(language, category_path, *args, **kwargs)
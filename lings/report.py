@@ -0,0 +1,37 @@
+# report.py
+
+
+class SegmentReport:
+    """Deduplicated untranslated segments with occurrence counts and locations.
+
+    Iterating yields one ``{"text", "count", "locations"}`` dict per unique
+    segment, in order of first appearance.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def add(self, text, location):
+        entry = self.entries.get(text)
+        if entry is None:
+            entry = self.entries[text] = {"text": text, "count": 0, "locations": []}
+        entry["count"] += 1
+        entry["locations"].append(location)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __contains__(self, text):
+        return text in self.entries
+
+    def texts(self):
+        return list(self.entries)
+
+    def occurrences(self):
+        return sum(entry["count"] for entry in self.entries.values())
+
+    def as_list(self):
+        return list(self.entries.values())
@@ -0,0 +1,116 @@
+# search.py
+import heapq
+from array import array
+from bisect import bisect_right
+from normalization import fold_text
+
+COLUMNS = {"All": (0, 1), "Original": (0,), "Translation": (1,)}
+
+
+class SearchIndex:
+    """Case-insensitive substring/prefix filter over an ``EntryStore``.
+
+    ``rebuild()`` folds every row into one string, ``"\\n" + original +
+    "\\t" + translation`` per row, and records where each row and each
+    translation starts. A query is then a ``str.find`` scan in C, and a hit at
+    any offset maps back to its row with one bisect; after a hit the scan
+    jumps to the next row, so the Python-level work is proportional to the
+    number of matching rows, not to the dictionary size. ``search()`` yields
+    lazily, so a caller can show the first screen of a large result at once.
+
+    Edits are recorded with ``touch(row_id)``: the row's old text in the base
+    string is masked and its new text kept in a small overlay that is scanned
+    linearly. The base is rebuilt once the overlay grows past ``MAX_OVERLAY``.
+    """
+
+    MAX_OVERLAY = 2000
+
+    def __init__(self, store):
+        self.store = store
+        self.rebuild()
+
+    def rebuild(self):
+        self.slot_ids = list(self.store.order)
+        self.starts = array("Q")  # 每行前的 "\n" 位置，末尾多一个哨兵
+        self.seps = array("Q")  # 每行 "\t" 的位置
+        parts = []
+        offset = 0
+        for row_id in self.slot_ids:
+            original, translation = self.store.get(row_id)
+            original, translation = self.fold(original), self.fold(translation)
+            self.starts.append(offset)
+            self.seps.append(offset + 1 + len(original))
+            parts.append(original)
+            parts.append(translation)
+            offset += len(original) + len(translation) + 2
+        self.starts.append(offset)
+        self.text = "".join(
+            f"\n{parts[i]}\t{parts[i + 1]}" for i in range(0, len(parts), 2)
+        )
+        self.stale = set()  # 基础索引中已失效的行 id
+        self.overlay = {}  # 行 id -> 折叠后的 (原文, 译文)
+
+    @staticmethod
+    def fold(text):
+        # 分隔符不能出现在条目里，否则会被当成行或列的边界
+        return fold_text(text, casefold=True).replace("\n", " ").replace("\t", " ")
+
+    def touch(self, row_id):
+        """Re-index ``row_id`` after it was added, edited or deleted."""
+        self.stale.add(row_id)
+        try:
+            original, translation = self.store.get(row_id)
+        except KeyError:  # 已删除
+            self.overlay.pop(row_id, None)
+        else:
+            self.overlay[row_id] = (self.fold(original), self.fold(translation))
+        if len(self.overlay) > self.MAX_OVERLAY:
+            self.rebuild()
+
+    def search(self, query, column="All", prefix=False):
+        """Yield matching row ids in store order; None for an empty query.
+
+        ``column`` is one of ``COLUMNS``; with ``prefix`` the query must match
+        at the start of the column text.
+        """
+        query = self.fold(query)
+        if not query:
+            return None
+        columns = COLUMNS[column]
+        overlay = sorted(
+            row_id
+            for row_id, texts in self.overlay.items()
+            if any(
+                texts[c].startswith(query) if prefix else query in texts[c]
+                for c in columns
+            )
+        )
+        if prefix:
+            # 前缀匹配直接查找 "分隔符 + 查询"，原文前是 "\n"，译文前是 "\t"
+            scans = [self._scan("\n\t"[c] + query, (c,)) for c in columns]
+        else:
+            scans = [self._scan(query, columns)]
+        # 行 id 按插入顺序递增，各路结果按 id 归并即为表格中的顺序
+        return _unique(heapq.merge(*scans, overlay))
+
+    def _scan(self, needle, columns):
+        find, starts, seps = self.text.find, self.starts, self.seps
+        slot_ids, stale = self.slot_ids, self.stale
+        pos = find(needle)
+        while pos != -1:
+            slot = bisect_right(starts, pos) - 1
+            in_original = pos < seps[slot]
+            if in_original and 0 not in columns:
+                pos = find(needle, seps[slot])  # 只查译文时跳到本行译文
+                continue
+            if (in_original or 1 in columns) and slot_ids[slot] not in stale:
+                yield slot_ids[slot]
+            pos = find(needle, starts[slot + 1])  # 跳过本行余下的部分
+
+
+def _unique(row_ids):
+    previous = None
+    for row_id in row_ids:
+        if row_id != previous:
+            yield row_id
+            previous = row_id
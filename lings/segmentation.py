@@ -0,0 +1,104 @@
+# segmentation.py
+"""Dictionary-driven segmentation for languages written without spaces.
+
+``text.split()`` leaves a Chinese paragraph as a single "word", so terms
+inside it are never looked up. Here the paragraph is instead cut by forward
+maximum matching over a character trie of the dictionary keys: at each
+position the longest key starting there is taken, otherwise one character
+is skipped. No position walks the trie deeper than the longest key, so for
+a given dictionary the cost grows linearly with the paragraph length.
+"""
+
+import itertools
+import re
+import unicodedata
+from matcher import TokenTrie
+
+# 汉字、假名等不用空格分词的文字
+UNSPACED_LANGUAGES = {"zh", "cn", "ja", "jp"}
+_UNSPACED = re.compile(r"[぀-ヿ㐀-䶿一-鿿豈-﫿]")
+# 按文字判断时抽样的词条数
+DETECT_SAMPLE = 1000
+
+
+def is_unspaced(text):
+    return _UNSPACED.search(text) is not None
+
+
+def needs_segmentation(language, keys):
+    """Whether source text of ``language`` should be segmented.
+
+    Decided by the source language code (``zh_ar`` -> ``zh``) when it is
+    known, otherwise by the script of a sample of dictionary ``keys``.
+    """
+    source = language.split("_")[0].lower() if language else ""
+    if source in UNSPACED_LANGUAGES:
+        return True
+    sample = list(itertools.islice(keys, DETECT_SAMPLE))
+    return bool(sample) and sum(map(is_unspaced, sample)) * 2 > len(sample)
+
+
+def target_separator(language):
+    # 目标语言同样不用空格时，译文直接拼接
+    parts = language.split("_") if language else []
+    if len(parts) > 1 and parts[1].lower() in UNSPACED_LANGUAGES:
+        return ""
+    return " "
+
+
+def needs_separator(before, after):
+    # 空白旁不再加分隔符；标点前（开括号、开引号除外）和开括号、开引号后也不加
+    if not before or not after or before[-1].isspace() or after[0].isspace():
+        return False
+    first = unicodedata.category(after[0])
+    last = unicodedata.category(before[-1])
+    if first.startswith("P") and first not in ("Ps", "Pi"):
+        return False
+    return last not in ("Ps", "Pi")
+
+
+def build_char_trie(items):
+    """Character trie of ``(key, value)`` items; earlier items win."""
+    trie = TokenTrie()
+    for key, value in items:
+        trie.add(key, value)
+    return trie
+
+
+def _inside_word(text, i):
+    # 拉丁字母等有空格的文字不能从单词中间切开
+    if i <= 0 or i >= len(text):
+        return False
+    before, after = text[i - 1], text[i]
+    return (
+        before.isalnum()
+        and after.isalnum()
+        and not (is_unspaced(before) or is_unspaced(after))
+    )
+
+
+def segment(text, trie):
+    """Split ``text`` by maximum matching into ``(start, end, value)`` spans.
+
+    ``value`` is the matched key's value, or None for text between keys.
+    """
+    pieces = []
+    unmatched = 0  # 尚未输出的未匹配片段起点
+    i = 0
+    while i < len(text):
+        match = None
+        if not _inside_word(text, i):
+            for end, value in trie.prefix_matches(text, i):
+                if not _inside_word(text, end):
+                    match = (end, value)
+        if match is None:
+            i += 1
+            continue
+        if unmatched < i:
+            pieces.append((unmatched, i, None))
+        end, value = match
+        pieces.append((i, end, value))
+        i = unmatched = end
+    if unmatched < len(text):
+        pieces.append((unmatched, len(text), None))
+    return pieces
@@ -0,0 +1,422 @@
+# snapshot.py
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from functools import partial
+from itertools import accumulate, product
+from collections.abc import Mapping, MutableMapping
+from matcher import TokenTrie
+from normalization import normalize_text
+
+MAGIC = b"LINGSNAP"
+FORMAT_VERSION = 3
+# magic, 格式版本, 源文件 mtime_ns, 源文件大小, 源文件 sha256, 词条数, 译文数, 短语数,
+# 词条散列表槽数, 短语前缀散列表槽数
+HEADER = struct.Struct("=8sIxxxxqq32sQQQQQ")
+MTIME = struct.Struct("=q")
+MTIME_OFFSET = struct.calcsize("=8sIxxxx")
+SNAPSHOT_DIR = ".compiled"
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _slot_count(n):
+    # 装载因子不超过 1/2，线性探测平均一两次即可
+    size = 8
+    while size < n * 2:
+        size *= 2
+    return size
+
+
+def _hash_table(hashes, count):
+    """Open-addressing table of ``count`` slots; slot ``j`` holds ``i + 1``."""
+    slots = array("I", bytes(4 * count))
+    mask = count - 1
+    for i, h in enumerate(hashes):
+        pos = h & mask
+        while slots[pos]:
+            pos = (pos + 1) & mask
+        slots[pos] = i + 1
+    return slots
+
+
+def _phrase_prefixes(keys):
+    # 多词词条的每个真前缀（按空格切分），查询时据此判断短语能否继续延长
+    prefixes = set()
+    for key in keys:
+        end = key.find(b" ")
+        while end > 0:
+            prefixes.add(key[:end])
+            end = key.find(b" ", end + 1)
+    return prefixes
+
+
+def _prefix_table(prefixes):
+    # 只存前缀的 crc32，不存文本：偶尔的哈希碰撞只会多试一个更长的短语
+    count = _slot_count(len(prefixes))
+    slots = array("I", bytes(4 * count))
+    mask = count - 1
+    for prefix in prefixes:
+        h = zlib.crc32(prefix) or 1
+        pos = h & mask
+        while slots[pos] and slots[pos] != h:
+            pos = (pos + 1) & mask
+        slots[pos] = h
+    return slots
+
+
+def snapshot_path(json_path, variant="raw"):
+    directory, filename = os.path.split(os.path.abspath(json_path))
+    return os.path.join(directory, SNAPSHOT_DIR, f"{filename}.{variant}.snap")
+
+
+def normalized_variant(ignore_case, strict_punctuation):
+    # 归一化索引按翻译选项分别编译
+    return f"norm-{int(ignore_case)}{int(not strict_punctuation)}"
+
+
+def compile_dictionary(json_path, output_path, normalize=None):
+    """Compile a JSON dictionary into a single memory-mappable file.
+
+    Keys (normalized with ``normalize`` if given, first key wins) are stored
+    in the source file's order, with a hash table over them for lookups;
+    identical translations are stored once. Normalized snapshots also get a
+    table of multi-word key prefixes, so phrases can be matched without
+    building anything at load time.
+    """
+    stat = os.stat(json_path)
+    digest = _file_digest(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        translations = json.load(f).get("translations", {})
+
+    entries = {}
+    for key, value in translations.items():
+        if normalize is not None:
+            key = normalize(key)
+            if not key:
+                continue
+        entries.setdefault(key.encode("utf-8"), value)
+    keys = list(entries)  # 保持源文件顺序，写回 JSON 时词条不会被重排
+
+    value_ids = {}
+    values = []
+    for key in keys:
+        value = entries[key]
+        if value not in value_ids:
+            value_ids[value] = len(values)
+            values.append(value.encode("utf-8"))
+
+    n_phrases = sum(1 for key in keys if b" " in key)
+    prefixes = _phrase_prefixes(keys) if normalize is not None else ()
+
+    # 快照只在本机生成和读取，表使用本机字节序，读取时直接 cast
+    sections = [
+        array("Q", accumulate(map(len, keys), initial=0)),
+        array("Q", accumulate(map(len, values), initial=0)),
+        array("I", [value_ids[entries[key]] for key in keys]),
+        _hash_table(map(zlib.crc32, keys), _slot_count(len(keys))),
+        _prefix_table(prefixes),
+        b"".join(keys),
+        b"".join(values),
+    ]
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                stat.st_mtime_ns,
+                stat.st_size,
+                digest,
+                len(keys),
+                len(values),
+                n_phrases,
+                len(sections[3]),
+                len(sections[4]),
+            )
+        )
+        for section in sections:
+            f.write(section)
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+    # 原子替换，已映射旧文件的进程不受影响
+    os.replace(tmp_path, output_path)
+    logging.info(f"Compiled {len(keys)} entries from {json_path} to {output_path}")
+
+
+class CompiledDictionary(Mapping):
+    """Read-only mapping over a memory-mapped snapshot.
+
+    Lookups go through the hash table stored in the file, so the file is
+    never decoded as a whole and its pages are shared between processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.source_mtime_ns,
+            self.source_size,
+            self.source_digest,
+            n_keys,
+            n_values,
+            self.n_phrases,
+            n_key_slots,
+            n_prefix_slots,
+        ) = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a Lings dictionary snapshot")
+
+        view = memoryview(self._mm)
+        pos = HEADER.size
+        sizes = [
+            (n_keys + 1) * 8,
+            (n_values + 1) * 8,
+            n_keys * 4,
+            n_key_slots * 4,
+            n_prefix_slots * 4,
+        ]
+        tables = []
+        for size in sizes:
+            pos = _align(pos)
+            tables.append(view[pos : pos + size])
+            pos += size
+        self._key_offsets = tables[0].cast("Q")
+        self._value_offsets = tables[1].cast("Q")
+        self._value_ids = tables[2].cast("I")
+        self._key_slots = tables[3].cast("I")
+        self._key_mask = n_key_slots - 1
+        self._prefix_slots = tables[4].cast("I")
+        self._prefix_mask = n_prefix_slots - 1
+        pos = _align(pos)
+        self._keys = view[pos : pos + self._key_offsets[n_keys]]
+        pos = _align(pos + self._key_offsets[n_keys])
+        self._values = view[pos : pos + self._value_offsets[n_values]]
+        self._len = n_keys
+
+    def __len__(self):
+        return self._len
+
+    def _key_at(self, i):
+        return bytes(self._keys[self._key_offsets[i] : self._key_offsets[i + 1]])
+
+    def _value_at(self, i):
+        value_id = self._value_ids[i]
+        start, end = self._value_offsets[value_id], self._value_offsets[value_id + 1]
+        return str(self._values[start:end], "utf-8")
+
+    def _find(self, key):
+        target = key.encode("utf-8")
+        slots, mask, offsets = self._key_slots, self._key_mask, self._key_offsets
+        pos = zlib.crc32(target) & mask
+        while True:
+            i = slots[pos]
+            if not i:
+                return -1
+            i -= 1
+            if self._keys[offsets[i] : offsets[i + 1]] == target:
+                return i
+            pos = (pos + 1) & mask
+
+    def __getitem__(self, key):
+        i = self._find(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return self._value_at(i)
+
+    def get(self, key, default=None):
+        # 热路径：未命中时不抛出 KeyError
+        i = self._find(key) if isinstance(key, str) else -1
+        return self._value_at(i) if i >= 0 else default
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield str(self._key_at(i), "utf-8")
+
+    def items(self):
+        for i in range(self._len):
+            yield str(self._key_at(i), "utf-8"), self._value_at(i)
+
+    def has_phrase_prefix(self, prefix):
+        """Whether some multi-word key starts with ``prefix`` and a space.
+
+        May rarely answer True wrongly (hash collision), never False wrongly.
+        """
+        h = zlib.crc32(prefix.encode("utf-8")) or 1
+        slots, mask = self._prefix_slots, self._prefix_mask
+        pos = h & mask
+        while True:
+            slot = slots[pos]
+            if slot == h:
+                return True
+            if not slot:
+                return False
+            pos = (pos + 1) & mask
+
+    def is_fresh(self, json_path):
+        stat = os.stat(json_path)
+        if (stat.st_mtime_ns, stat.st_size) == (
+            self.source_mtime_ns,
+            self.source_size,
+        ):
+            return True
+        if (
+            stat.st_size != self.source_size
+            or _file_digest(json_path) != self.source_digest
+        ):
+            return False
+        # 内容未变，只是 mtime 变了（touch、checkout、复制）：记下新的 mtime，
+        # 下次启动不必再计算哈希
+        try:
+            with open(self.path, "r+b") as f:
+                f.seek(MTIME_OFFSET)
+                f.write(MTIME.pack(stat.st_mtime_ns))
+            self.source_mtime_ns = stat.st_mtime_ns
+        except OSError as e:
+            logging.warning(f"Failed to update snapshot {self.path}: {e}")
+        return True
+
+
+class OverlayDict(MutableMapping):
+    """Writable view over a read-only base mapping; edits stay in memory."""
+
+    def __init__(self, base):
+        self.base = base
+        self.changes = {}
+        self.deleted = set()
+
+    def __getitem__(self, key):
+        if key in self.changes:
+            return self.changes[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        return self.base[key]
+
+    def get(self, key, default=None):
+        if self.changes or self.deleted:
+            if key in self.changes:
+                return self.changes[key]
+            if key in self.deleted:
+                return default
+        return self.base.get(key, default)
+
+    def __setitem__(self, key, value):
+        self.changes[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.changes.pop(key, None)
+        self.deleted.add(key)
+
+    def __contains__(self, key):
+        return key in self.changes or (key not in self.deleted and key in self.base)
+
+    def __iter__(self):
+        # 与 dict 一致：修改过的词条保持原位置，新词条排在最后
+        for key in self.base:
+            if key not in self.deleted:
+                yield key
+        for key in self.changes:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class SnapshotPhrases:
+    """Phrase lookup over a snapshot index with the ``TokenTrie`` interface.
+
+    A phrase is extended word by word while the snapshot's prefix table says
+    a longer key may exist, and each candidate is looked up in ``index`` (an
+    ``OverlayDict`` over the compiled normalized keys), so edits are seen and
+    nothing is built when the snapshot is loaded. Phrases added later are
+    kept in a small trie.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.compiled = index.base
+        self.added = TokenTrie()
+
+    def __len__(self):
+        return self.compiled.n_phrases + len(self.added)
+
+    def add(self, tokens, value, replace=False):
+        self.added.add(tokens, value, replace)
+
+    def longest_match(self, tokens, start=0):
+        """Return ``(end, value)`` for the longest phrase at ``start``, or None."""
+        best = None
+        phrase = tokens[start]
+        end = start + 1
+        while end < len(tokens) and self.compiled.has_phrase_prefix(phrase):
+            phrase = f"{phrase} {tokens[end]}"
+            end += 1
+            value = self.index.get(phrase)
+            if value is not None:
+                best = (end, value)
+        if self.added:
+            added = self.added.longest_match(tokens, start)
+            if added and (best is None or added[0] > best[0]):
+                best = added
+        return best
+
+
+def load_snapshot(json_path, variant="raw", normalize=None):
+    """Open the compiled snapshot of ``json_path``, rebuilding it if stale."""
+    path = snapshot_path(json_path, variant)
+    if os.path.exists(path):
+        try:
+            compiled = CompiledDictionary(path)
+            if compiled.is_fresh(json_path):
+                return compiled
+        except ValueError as e:
+            logging.warning(f"Ignoring invalid snapshot: {e}")
+    compile_dictionary(json_path, path, normalize)
+    return CompiledDictionary(path)
+
+
+if __name__ == "__main__":
+    # 预先编译词典的原始词条和各翻译选项的归一化索引：
+    # python lings/snapshot.py data/*.json
+    for json_path in sys.argv[1:]:
+        compile_dictionary(json_path, snapshot_path(json_path))
+        print(snapshot_path(json_path))
+        for ignore_case, strict_punctuation in product((True, False), repeat=2):
+            path = snapshot_path(
+                json_path, normalized_variant(ignore_case, strict_punctuation)
+            )
+            normalize = partial(
+                normalize_text,
+                casefold=ignore_case,
+                strip_punctuation=not strict_punctuation,
+            )
+            compile_dictionary(json_path, path, normalize)
+            print(path)
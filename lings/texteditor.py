@@ -1,36 +1,56 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
-import pandas as pd
 from docx import Document
 from docx.shared import RGBColor
 import logging
-from plugins.deepl_translator import translate_text  # 假设deepl_translator插件存在
+import os
+import queue
+from entrystore import EntryStore
+from jobs import MachineTranslationJob
+from logutil import setup_logging
+from treeview import VirtualTreeview
+from plugins.deepl_translator import (  # 假设deepl_translator插件存在
+    confirm_translations,
+    iter_translations,
+    translate_text,
+)
 
 # 配置日志记录
-logging.basicConfig(
-    filename="translation.log",
-    level=logging.DEBUG,
-    format="%(asctime)s:%(levelname)s:%(message)s",
-)
+setup_logging(level=logging.DEBUG)
+
+
+def untranslated_path(output_file):
+    root, _ = os.path.splitext(output_file)
+    return f"{root}.untranslated.docx"
 
 
 class TextEditor:
+    POLL_INTERVAL_MS = 100
+
     def __init__(self, root, untranslated_segments=None, file_path=None):
         self.root = root
         self.root.title("Text Editor")
 
+        if untranslated_segments and file_path:
+            # 未翻译段落另存一份，不覆盖已翻译好的文档
+            file_path = untranslated_path(file_path)
         self.file_path = tk.StringVar(value=file_path)
-        self.data = pd.DataFrame(columns=["Original", "Translation"])
+        self.store = EntryStore()
+        self.scores = {}  # 行 id -> 预填建议与词典词条的相似度
         self.font_size = tk.IntVar(value=10)
         self.editing_item = None
         self.editing_column = None
         self.entry_edit = None
+        self.mt_job = None
+        self.mt_row_ids = []
+        self.mt_status = tk.StringVar()
 
         self.create_widgets()
-        if file_path:
-            self.load_word_file()
-        elif untranslated_segments:
+        # 从翻译结果打开时编辑未翻译的段落
+        if untranslated_segments:
             self.load_untranslated_segments(untranslated_segments)
+        elif file_path:
+            self.load_word_file()
 
     def create_widgets(self):
         frame = tk.Frame(self.root)
@@ -49,20 +69,26 @@ class TextEditor:
 
         self.tree = ttk.Treeview(
             tree_frame,
-            columns=("Original", "Translation"),
+            columns=("Original", "Translation", "Score"),
             show="headings",
             selectmode="browse",
         )
         self.tree.heading("Original", text="Original")
         self.tree.heading("Translation", text="Translation")
+        self.tree.heading("Score", text="Score")
         self.tree.column("Original", anchor="w", width=300)
         self.tree.column("Translation", anchor="w", width=300)
+        self.tree.column("Score", anchor="e", width=60, stretch=False)
 
         self.vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
         self.hsb = ttk.Scrollbar(
             tree_frame, orient="horizontal", command=self.tree.xview
         )
-        self.tree.configure(yscroll=self.vsb.set, xscroll=self.hsb.set)
+        self.tree.configure(xscroll=self.hsb.set)
+        # 只创建可见行和少量缓冲行，滚动时原地改写
+        self.view = VirtualTreeview(
+            self.tree, self.vsb, lambda: len(self.store), self.get_row
+        )
 
         self.vsb.pack(side="right", fill="y")
         self.hsb.pack(side="bottom", fill="x")
@@ -78,7 +104,7 @@ class TextEditor:
         self.tree.bind("<Button-3>", self.show_context_menu)  # 绑定右键点击事件
         self.tree.bind("<Motion>", self.on_motion)  # 绑定鼠标移动事件
         self.vsb.bind("<Motion>", self.on_motion)  # 绑定垂直滚动条的鼠标移动事件
-        self.tree.bind("<Configure>", self.on_resize)  # 绑定窗口大小调整事件
+        self.tree.bind("<Configure>", self.on_resize, add="+")  # 绑定窗口大小调整事件
 
         frame.grid_rowconfigure(1, weight=1)
         frame.grid_columnconfigure(1, weight=1)
@@ -113,6 +139,27 @@ class TextEditor:
             command=self.update_treeview_style,
         ).grid(row=1, column=1, padx=5, pady=5)
 
+        self.translate_all_button = tk.Button(
+            button_frame,
+            text="Translate Untranslated with DeepL",
+            command=self.translate_untranslated,
+        )
+        self.translate_all_button.grid(row=1, column=2, padx=5, pady=5)
+        self.cancel_mt_button = tk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_machine_translation,
+            state="disabled",
+        )
+        self.cancel_mt_button.grid(row=1, column=3, padx=5, pady=5)
+        self.mt_progress = ttk.Progressbar(
+            button_frame, orient="horizontal", length=150, mode="determinate"
+        )
+        self.mt_progress.grid(row=1, column=4, padx=5, pady=5)
+        tk.Label(button_frame, textvariable=self.mt_status).grid(
+            row=1, column=5, padx=5, pady=5, sticky="w"
+        )
+
         # 创建右键菜单
         self.context_menu = tk.Menu(self.tree, tearoff=0)
         self.context_menu.add_command(
@@ -146,6 +193,7 @@ class TextEditor:
         self.tree.tag_configure("evenrow", background="lightblue")
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col, anchor="w")
+        self.view.refresh()  # 行高变化后重新计算可见行数
 
     def load_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Word files", "*.docx")])
@@ -169,53 +217,61 @@ class TextEditor:
                 logging.debug(f"Paragraph text: {text}")
                 original = text
                 translation = ""
-                rows.append({"Original": original, "Translation": translation})
+                rows.append((original, translation))
 
-        self.data = pd.DataFrame(rows, columns=["Original", "Translation"])
-        if self.data.empty:
+        self.store.load(rows)
+        self.scores = {}
+        if not self.store:
             logging.warning("No entries found in the document.")
         self.update_treeview()
 
     def load_untranslated_segments(self, segments):
-        rows = [{"Original": segment, "Translation": ""} for segment in segments]
-        self.data = pd.DataFrame(rows, columns=["Original", "Translation"])
-        if self.data.empty:
+        # segments 可以是 translate_document 返回的去重报告，也可以是字符串列表
+        # 报告中带有模糊匹配建议时，用建议预填译文并显示相似度
+        rows = []
+        scores = []
+        for segment in segments:
+            if isinstance(segment, dict):
+                rows.append((segment["text"], segment.get("suggestion") or ""))
+                scores.append(
+                    segment.get("score") if segment.get("suggestion") else None
+                )
+            else:
+                rows.append((segment, ""))
+                scores.append(None)
+        self.store.load(rows)
+        self.scores = {
+            self.store.row_id(index): score
+            for index, score in enumerate(scores)
+            if score
+        }
+        if not self.store:
             logging.warning("No entries found in the document.")
         self.update_treeview()
 
+    def get_row(self, index):
+        original, translation = self.store.row(index)
+        score = self.scores.get(self.store.row_id(index))
+        return original, translation, f"{score:.0%}" if score else ""
+
     def update_treeview(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for i, (_, row) in enumerate(self.data.iterrows()):
-            tags = ("evenrow",) if i % 2 == 0 else ("oddrow",)
-            self.tree.insert(
-                "",
-                "end",
-                iid=i,
-                values=(row["Original"], row.get("Translation", "")),
-                tags=tags,
-            )
+        self.view.refresh()
 
     def add_entry(self):
         original = simpledialog.askstring("Add Entry", "Enter the original text:")
         translation = simpledialog.askstring("Add Entry", "Enter the translation:")
         if original and translation:
-            self.data = pd.concat(
-                [
-                    self.data,
-                    pd.DataFrame([{"Original": original, "Translation": translation}]),
-                ],
-                ignore_index=True,
-            )
-            self.update_treeview()
+            self.store.add(original, translation)
+            self.view.select(len(self.store) - 1)
             logging.info(f"Added entry: {original} -> {translation}")
 
     def delete_entry(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            original = self.tree.item(selected_item, "values")[0]
-            self.data = self.data[self.data["Original"] != original]
-            self.update_treeview()
+        index = self.view.selected()
+        if index is not None:
+            original, _ = self.store.row(index)
+            self.scores.pop(self.store.delete(index), None)
+            self.view.selected_index = None
+            self.view.refresh()
             logging.info(f"Deleted entry: {original}")
 
     def save_file(self):
@@ -244,9 +300,9 @@ class TextEditor:
 
     def save_word_file(self, file_path, save_original):
         doc = Document()
-        for _, row in self.data.iterrows():
-            original = row["Original"].strip()
-            translation = row["Translation"].strip()
+        for original, translation in self.store:
+            original = original.strip()
+            translation = translation.strip()
             if original:
                 p = doc.add_paragraph()
                 if save_original:
@@ -263,20 +319,29 @@ class TextEditor:
                             255, 0, 0
                         )  # 翻译设置为红色
         doc.save(file_path)
+        self.store.mark_clean()
+        # 保存时保留未改动的机器翻译结果视为已确认，可导出到词典
+        confirm_translations(
+            [
+                (original, translation)
+                for original, translation in self.store
+                if translation
+            ],
+            "EN",
+        )
 
     def translate_selected(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            original_text = self.tree.item(selected_item, "values")[0]
+        index = self.view.selected()
+        if index is not None:
+            original_text, _ = self.store.row(index)
             translated_text = translate_text(
                 original_text, "EN"
             )  # 假设目标语言是英文，你可以根据需要调整
             if translated_text:
-                self.tree.set(selected_item, column=1, value=translated_text)
-                original = self.tree.item(selected_item, "values")[0]
-                self.data.loc[self.data["Original"] == original, "Translation"] = (
-                    translated_text
-                )
+                row_id = self.store.row_id(index)
+                self.store.update(row_id, 1, translated_text)
+                self.scores.pop(row_id, None)
+                self.view.refresh_row(index)
                 logging.info(f"Translated text: {original_text} -> {translated_text}")
             else:
                 messagebox.showerror(
@@ -287,6 +352,7 @@ class TextEditor:
         if not self.tree.selection():
             return
         self.editing_item = self.tree.selection()[0]
+        self.editing_index = self.view.index_of(self.editing_item)
         self.editing_column = self.tree.identify_column(event.x)
         self.start_edit()
 
@@ -304,12 +370,87 @@ class TextEditor:
         if self.entry_edit:
             self.update_edit_box_position()
 
+    def translate_untranslated(self):
+        if self.mt_job:
+            return
+        rows = [
+            (row_id, original)
+            for row_id, (original, translation) in self.store.items()
+            if original.strip() and not translation.strip()
+        ]
+        if not rows:
+            messagebox.showinfo("Machine Translation", "All rows are translated.")
+            return
+        self.mt_row_ids = [row_id for row_id, _ in rows]
+        # 请求在后台线程中分批、并发发送，主线程只负责把结果填回表格
+        self.mt_job = MachineTranslationJob(
+            iter_translations, [original for _, original in rows], "EN"
+        )  # 假设目标语言是英文，你可以根据需要调整
+        self.translate_all_button.config(state="disabled")
+        self.cancel_mt_button.config(state="normal")
+        self.mt_progress["value"] = 0
+        self.mt_status.set(f"0/{len(rows)}")
+        self.mt_job.start()
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_machine_translation)
+
+    def cancel_machine_translation(self):
+        if self.mt_job:
+            self.mt_job.cancel()
+            self.cancel_mt_button.config(state="disabled")
+            self.mt_status.set("Cancelling...")
+
+    def poll_machine_translation(self):
+        job = self.mt_job
+        finished = None
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                _, pairs, done, total = event
+                self.apply_machine_translations(pairs)
+                self.mt_progress["value"] = done * 100 / total
+                self.mt_status.set(f"{done}/{total}")
+            else:
+                finished = event
+        if finished is None:
+            self.root.after(self.POLL_INTERVAL_MS, self.poll_machine_translation)
+            return
+
+        self.mt_job = None
+        self.translate_all_button.config(state="normal")
+        self.cancel_mt_button.config(state="disabled")
+        failed = sum(
+            1
+            for row_id in self.mt_row_ids
+            if row_id in self.store and not self.store.get(row_id)[1].strip()
+        )
+        self.mt_status.set(f"{len(self.mt_row_ids) - failed} translated")
+        if finished[0] == "error":
+            messagebox.showerror("Error", f"Machine translation failed: {finished[1]}")
+        elif finished[0] == "done" and failed:
+            messagebox.showwarning(
+                "Machine Translation", f"{failed} rows could not be translated."
+            )
+        logging.info(f"Machine translation finished: {finished[0]}, {failed} failed")
+
+    def apply_machine_translations(self, pairs):
+        for i, translation in pairs:
+            row_id = self.mt_row_ids[i]
+            if not translation or row_id not in self.store:
+                continue  # 请求失败，或该行已被删除
+            if self.store.get(row_id)[1].strip():
+                continue  # 翻译期间已被手动填写，不覆盖
+            self.store.update(row_id, 1, translation)
+            self.view.refresh_row(self.store.index_of(row_id))
+
     def start_edit(self):
         if not self.editing_column:
             return
         item = self.tree.item(self.editing_item, "values")
         column = int(self.editing_column[1:]) - 1  # column name to index
-        if column < 0:
+        if not 0 <= column <= 1:  # 相似度列只读
             return
         bbox = self.tree.bbox(self.editing_item, self.editing_column)
         if not bbox:
@@ -324,15 +465,13 @@ class TextEditor:
     def save_edit(self):
         new_value = self.entry_edit.get()
         column = int(self.editing_column[1:]) - 1
-        self.tree.set(self.editing_item, column=column, value=new_value)
-        original = self.tree.item(self.editing_item, "values")[0]
-        self.data.loc[
-            self.data["Original"] == original, self.tree["columns"][column]
-        ] = new_value
-        logging.info(f"Edited entry: {original} -> {new_value}")
+        row_id = self.store.row_id(self.editing_index)
+        if self.store.update(row_id, column, new_value) and column == 1:
+            self.scores.pop(row_id, None)  # 已人工修改，不再是建议
+        self.view.refresh_row(self.editing_index)  # 只更新被编辑的一行
+        logging.info(f"Edited entry: {self.store.get(row_id)[0]} -> {new_value}")
         self.entry_edit.destroy()
         self.entry_edit = None
-        self.update_treeview()
 
     def cancel_edit(self):
         if self.entry_edit:
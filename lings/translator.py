@@ -1,19 +1,48 @@
 import json
 import os
 import logging
+import re
 from docx import Document
 from docx.shared import RGBColor
 from docx.oxml.ns import qn
-
-# 配置日志记录
-logging.basicConfig(
-    filename="translation.log",
-    level=logging.INFO,
-    format="%(asctime)s:%(levelname)s:%(message)s",
+from cache import LRUCache
+from docx_stream import StreamingDocxRewriter
+from docx_walk import iter_document_paragraphs
+from fuzzy import FuzzyIndex
+from layers import LayeredDict, LayeredPhrases
+from logutil import PhaseTimer, TranslationCounters, setup_logging
+from matcher import AhoCorasick, TokenTrie
+from normalization import fold_text, normalize_text
+from report import SegmentReport
+from segmentation import (
+    build_char_trie,
+    needs_segmentation,
+    needs_separator,
+    segment,
+    target_separator,
 )
+from snapshot import OverlayDict, SnapshotPhrases, load_snapshot, normalized_variant
+
+# 配置日志记录：经队列由后台线程写入文件
+setup_logging()
+
+
+def phrase_table(index):
+    if isinstance(index, OverlayDict):
+        # 快照在编译时已存好短语前缀表，加载时不必遍历词条
+        return SnapshotPhrases(index)
+    phrases = TokenTrie()
+    for key, value in index.items():
+        if " " in key:
+            phrases.add(key.split(" "), value)
+    return phrases
 
 
 class Translator:
+    SEGMENT_CACHE_SIZE = 20000
+    WORD_CACHE_SIZE = 50000
+    SUGGESTION_MIN_SCORE = 0.7
+
     def __init__(
         self,
         language,
@@ -21,100 +50,398 @@ class Translator:
         strict_punctuation=True,
         ignore_case=False,
         partial_match=False,
+        use_snapshot=False,
+        dictionary=None,
+        fallbacks=None,
+        segmentation=None,
     ):
         self.language = language
-        self.category_path = category_path
+        # 可以传入多个词典，按优先级从高到低排列；新增词条写入第一个
+        if isinstance(category_path, (list, tuple)):
+            self.category_paths = list(category_path)
+        else:
+            self.category_paths = [category_path]
+        self.category_path = self.category_paths[0]
         self.strict_punctuation = strict_punctuation
         self.ignore_case = ignore_case
         self.partial_match = partial_match
-        self.is_arabic = "ar" in category_path
+        self.use_snapshot = use_snapshot
+        # registry.Dictionary（或与 category_paths 对应的列表），多个视图共享
+        if isinstance(dictionary, (list, tuple)):
+            self.dictionaries = list(dictionary)
+        else:
+            self.dictionaries = [dictionary] if dictionary is not None else []
+        self.dictionary = self.dictionaries[0] if self.dictionaries else None
+        # 词典未翻译的段落依次交给这些后备阶段（翻译记忆、机器翻译），见 providers.py
+        self.fallbacks = list(fallbacks or [])
+        # 中文等不用空格的源语言按词典最大匹配切分；None 表示根据语言和词条自动判断
+        self.segmentation = segmentation
+        self.segmented = False
+        self.separator = target_separator(language)
+        self.is_arabic = any("ar" in path for path in self.category_paths)
+        self.options = (strict_punctuation, ignore_case, partial_match)
+        self.version = 0
+        self.segment_cache = LRUCache(self.SEGMENT_CACHE_SIZE)
+        self.word_cache = LRUCache(self.WORD_CACHE_SIZE)
+        self.counters = TranslationCounters()
+        self.timings = PhaseTimer()
+        self.last_stats = {}
+        self.index = {}
+        self.phrases = TokenTrie()
+        self._matcher = None
+        self._fuzzy = None
+        self._chars = None
         self.word_dict = self.load_word_dict()
 
+    def normalize(self, text):
+        return normalize_text(
+            text,
+            casefold=self.ignore_case,
+            strip_punctuation=not self.strict_punctuation,
+        )
+
     def load_word_dict(self):
+        # 多个词典叠加成一个分层视图，查找时逐层查询，不合并复制
+        self.timings.reset(["load_dictionary"])
+        with self.timings.phase("load_dictionary"):
+            if self.dictionaries:
+                layers = [(d.entries, None) for d in self.dictionaries]
+            else:
+                layers = [self.load_layer(path) for path in self.category_paths]
+            entries = [word_dict for word_dict, _ in layers]
+            word_dict = entries[0] if len(entries) == 1 else LayeredDict(*entries)
+            self.build_index(word_dict, [index for _, index in layers])
+        return word_dict
+
+    def load_layer(self, path):
+        """Return ``(entries, normalized index or None)`` for one dictionary file."""
+        if self.use_snapshot:
+            try:
+                return self.load_snapshot(path)
+            except FileNotFoundError:
+                pass  # 由下面的 JSON 路径记录错误
+            except (OSError, ValueError) as e:
+                logging.error(f"Failed to load snapshot for {path}: {e}")
         try:
-            with open(self.category_path, "r", encoding="utf-8") as f:
+            with open(path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                logging.info(f"Loaded word dictionary from {self.category_path}")
-                logging.debug(f"Word dictionary content: {data}")
-                return data.get("translations", {})
+                word_dict = data.get("translations", {})
+                logging.info("Loaded %d entries from %s", len(word_dict), path)
         except FileNotFoundError:
-            logging.error(f"Word dictionary file {self.category_path} not found")
-            return {}
+            logging.error(f"Word dictionary file {path} not found")
+            word_dict = {}
+        return word_dict, None
+
+    def load_snapshot(self, path):
+        # 原始词条和归一化索引都从内存映射的编译文件读取，无需解析 JSON
+        word_dict = load_snapshot(path)
+        index = load_snapshot(
+            path,
+            normalized_variant(self.ignore_case, self.strict_punctuation),
+            self.normalize,
+        )
+        logging.info(f"Loaded dictionary snapshot for {path}")
+        return OverlayDict(word_dict), OverlayDict(index)
+
+    def normalize_entries(self, word_dict):
+        # 词条键只归一化一次，查询时每个词或段落只需一次哈希查找
+        index = {}
+        for key, value in word_dict.items():
+            normalized = self.normalize(key)
+            if normalized:
+                index.setdefault(normalized, value)
+        return index
+
+    def build_index(self, word_dict, indexes=None):
+        """Build the lookup index and phrase tables for ``word_dict``.
+
+        ``indexes`` holds an already normalized index per layer (None where
+        it has to be built). Layers are indexed separately and stacked in the
+        same order, so a higher layer's entry shadows a lower one's.
+        """
+        layers = word_dict.maps if isinstance(word_dict, LayeredDict) else [word_dict]
+        built = []
+        phrases = []
+        for entries, index in zip(layers, indexes or [None] * len(layers)):
+            if index is None:
+                index = self.normalize_entries(entries)
+            built.append(index)
+            phrases.append(phrase_table(index))
+        if len(built) == 1:
+            self.index, self.phrases = built[0], phrases[0]
+        else:
+            self.index, self.phrases = LayeredDict(*built), LayeredPhrases(phrases)
+        self.segmented = self.segmentation
+        if self.segmented is None:
+            self.segmented = needs_segmentation(self.language, iter(word_dict))
+        self._matcher = None
+        self._fuzzy = None
+        self._chars = None
+        self.invalidate_caches()
+
+    def invalidate_caches(self):
+        # 词典版本号也是缓存键的一部分，旧结果不会再被命中
+        self.version += 1
+        self.segment_cache.clear()
+        self.word_cache.clear()
+
+    def cache_stats(self):
+        return {
+            "segments": self.segment_cache.stats(),
+            "words": self.word_cache.stats(),
+        }
 
     def save_word_dict(self):
+        if self.dictionary is not None:
+            self.dictionary.flush()
+            return
+        top = self.word_dict
+        if isinstance(top, LayeredDict):
+            top = top.maps[0]  # 只写回最上层，下层词典保持不变
         with open(self.category_path, "w", encoding="utf-8") as f:
-            json.dump({"translations": self.word_dict}, f, ensure_ascii=False, indent=4)
+            json.dump({"translations": dict(top)}, f, ensure_ascii=False, indent=4)
         logging.info(f"Saved word dictionary to {self.category_path}")
 
     def add_translation(self, word, translation):
+        if self.dictionary is not None:
+            # 由共享词典统一更新所有视图并延迟写盘
+            self.dictionary.add_translation(word, translation)
+            return
         self.word_dict[word] = translation
+        self.update_index(word, translation)
         self.save_word_dict()
         logging.info(f"Added translation: {word} -> {translation}")
 
-    def translate_word(self, word):
-        if self.is_arabic:
-            word_clean = (
-                "".join(filter(str.isalnum, word))
-                if not self.strict_punctuation
-                else word
+    def update_index(self, word, translation, layer=0):
+        """Index an entry added to ``layer`` (0 is the top dictionary)."""
+        normalized = self.normalize(word)
+        if normalized:
+            shadowed = False
+            if isinstance(self.index, LayeredDict):
+                self.index.maps[layer][normalized] = translation
+                shadowed = any(normalized in m for m in self.index.maps[:layer])
+            else:
+                self.index[normalized] = translation
+            if " " in normalized:
+                # 每层各有短语表，查询时上层优先，不必考虑遮蔽
+                phrases = self.phrases
+                if isinstance(phrases, LayeredPhrases):
+                    phrases = phrases.maps[layer]
+                phrases.add(normalized.split(" "), translation, replace=True)
+            if self._chars is not None and not shadowed:
+                self._chars.add(normalized, translation, replace=True)
+        self._matcher = None  # 词典已变化，下次部分匹配时重建
+        if self._fuzzy is not None:
+            self._fuzzy.add(word, self.word_dict[word])
+        self.invalidate_caches()
+
+    def get_matcher(self):
+        # 按词典只构建一次，部分匹配时一次扫描找出所有词条
+        if self._matcher is None:
+            matcher = AhoCorasick()
+            for key, value in self.word_dict.items():
+                matcher.add(fold_text(key, self.ignore_case), value)
+            self._matcher = matcher.build()
+        return self._matcher
+
+    def char_trie(self):
+        # 切分用的字符前缀树，第一次切分时才构建；上层词典的词条优先
+        if self._chars is None:
+            layers = (
+                self.index.maps if isinstance(self.index, LayeredDict) else [self.index]
+            )
+            self._chars = build_char_trie(
+                item for layer in layers for item in layer.items()
             )
+            logging.info(f"Built segmentation trie with {len(self._chars)} entries")
+        return self._chars
 
-            if self.partial_match:
-                for key in self.word_dict:
-                    if key in word_clean:
-                        translated_word = word.replace(key, self.word_dict[key])
-                        logging.info(
-                            f"Partially matched and translated: {word} -> {translated_word}"
-                        )
-                        return translated_word
-
-            translation = self.word_dict.get(word_clean, word)
-            if translation != word:
-                logging.info(f"Translated: {word} -> {translation}")
-            return translation
-        else:
-            lookup_word = word.lower() if self.ignore_case else word
-
-            if self.partial_match:
-                for key in self.word_dict:
-                    key_compare = key.lower() if self.ignore_case else key
-                    if key_compare in lookup_word:
-                        translated_word = lookup_word.replace(
-                            key_compare, self.word_dict[key]
-                        )
-                        logging.info(
-                            f"Partially matched and translated: {lookup_word} -> {translated_word}"
-                        )
-                        return translated_word
-
-            if self.strict_punctuation:
-                translation = self.word_dict.get(lookup_word, word)
-            else:
-                word_clean = "".join(filter(str.isalnum, lookup_word))
-                translation = self.word_dict.get(word_clean, lookup_word)
+    def fuzzy_index(self):
+        # 只在需要建议时构建，之后新增的词条直接追加
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex(self.word_dict)
+        return self._fuzzy
+
+    def suggest_translations(self, report, min_score=None):
+        """Attach the closest dictionary entry to each untranslated segment.
 
-            if lookup_word != translation:
-                logging.info(f"Translated: {word} -> {translation}")
+        Entries in ``report`` gain ``suggestion`` (the entry's translation or
+        None), ``score`` (similarity in [0, 1]) and ``match`` (the entry's
+        original text). Returns the number of segments with a suggestion.
+        """
+        if min_score is None:
+            min_score = self.SUGGESTION_MIN_SCORE
+        index = self.fuzzy_index()
+        suggested = 0
+        for entry in report:
+            found = index.lookup(entry["text"], min_score)
+            score, match, suggestion = found or (0.0, None, None)
+            entry.update(suggestion=suggestion, score=score, match=match)
+            suggested += found is not None
+        logging.info(
+            f"Suggested translations for {suggested} of {len(report)} segments"
+        )
+        return suggested
+
+    def translate_word(self, word, lookup_word=None):
+        key = (self.version, self.options, word)
+        cached = self.word_cache.get(key)
+        if cached is None:
+            cached = self._translate_word(word, lookup_word)
+            self.word_cache.put(key, cached)
+        translation, outcome = cached
+        # 热路径只累加计数，每个文档汇总记录一次
+        self.counters.words += 1
+        setattr(self.counters, outcome, getattr(self.counters, outcome) + 1)
+        return translation
+
+    def _translate_word(self, word, lookup_word=None):
+        if self.partial_match:
+            translated_word, count = self.get_matcher().replace(
+                fold_text(word, self.ignore_case), source=word
+            )
+            if count:
+                return translated_word, "partial_hits"
 
-            return translation
+        if lookup_word is None:
+            lookup_word = self.normalize(word)
+        translation = self.index.get(lookup_word)
+        if translation is None:
+            return word, "misses"
+        return translation, "hits"
 
     def translate_text(self, text):
-        logging.debug(f"Translating text: {text}")
-        if text in self.word_dict:
-            translated_text = self.word_dict[text]
-            logging.info(f"Translated paragraph: {text} -> {translated_text}")
+        key = (self.version, self.options, text)
+        cached = self.segment_cache.get(key)
+        if cached is None:
+            before = self.counters.snapshot()
+            result = self._translate_text(text)
+            delta = tuple(
+                after - prev for after, prev in zip(self.counters.snapshot(), before)
+            )
+            self.segment_cache.put(key, (result, delta))
+        else:
+            # 缓存命中时补记该段落原本产生的计数
+            result, delta = cached
+            self.counters.add(delta)
+        self.counters.segments += 1
+        return result
+
+    def _translate_text(self, text):
+        translated_text = self.index.get(self.normalize(text))
+        if translated_text is not None:
+            self.counters.segment_hits += 1
+            logging.debug("Translated paragraph: %s -> %s", text, translated_text)
             return translated_text, True
 
-        words = text.split()
-        new_words = [self.translate_word(word) for word in words]
-        translated_text = " ".join(new_words)
+        if self.segmented:
+            translated_text = self.translate_segmented(text)
+        else:
+            translated_text = self.translate_words(text)
 
         if translated_text != text:
-            logging.info(f"Translated paragraph: {text} -> {translated_text}")
+            logging.debug("Translated paragraph: %s -> %s", text, translated_text)
             return translated_text, True
         else:
             return text, False
 
+    def translate_words(self, text):
+        words = text.split()
+        lookup_words = [self.normalize(word) for word in words]
+        new_words = []
+        i = 0
+        while i < len(words):
+            # 先尝试最长的多词短语，否则退回到单词查找
+            match = (
+                self.phrases.longest_match(lookup_words, i) if self.phrases else None
+            )
+            if match and match[0] - i > 1:
+                end, translation = match
+                new_words.append(translation)
+                i = end
+            else:
+                new_words.append(self.translate_word(words[i], lookup_words[i]))
+                i += 1
+        return " ".join(new_words)
+
+    def translate_segmented(self, text):
+        """Translate dictionary terms found inside ``text`` by maximum matching.
+
+        Text between terms is translated word by word as usual, so Latin
+        words and numbers mixed into a Chinese paragraph are still looked up.
+        It keeps its original whitespace; the target language's separator is
+        only inserted next to a translation. ``text`` is returned unchanged
+        when nothing was translated.
+        """
+        original = text
+        folded = fold_text(text, self.ignore_case)
+        if len(folded) != len(text):
+            text = folded  # 归一化改变了长度时，未匹配的部分取归一化后的文本
+        pieces = []  # (文本, 是否为译文)
+        for start, end, translation in segment(folded, self.char_trie()):
+            if translation is None:
+                for part in re.split(r"(\s+)", text[start:end]):
+                    if part.isspace():
+                        pieces.append((part, False))
+                    elif part:
+                        new_part = self.translate_word(part)
+                        pieces.append((new_part, new_part != part))
+            else:
+                self.counters.words += 1
+                self.counters.hits += 1
+                pieces.append((translation, True))
+        if not any(translated for _, translated in pieces):
+            return original
+        new_text = []
+        previous = False
+        for piece, translated in pieces:
+            if (
+                new_text
+                and (translated or previous)
+                and needs_separator(new_text[-1], piece)
+            ):
+                new_text.append(self.separator)
+            new_text.append(piece)
+            previous = translated
+        return "".join(new_text)
+
+    def translate_texts(self, texts, progress=None):
+        """Translate distinct ``texts``, returning ``{text: (result, modified)}``.
+
+        Texts the dictionary leaves untranslated are passed to each fallback
+        stage in turn, one batch per stage; whatever a stage misses goes on to
+        the next one.
+        """
+        results = {}
+        for text in texts:
+            results[text] = self.translate_text(text)
+            if progress:
+                progress()
+        misses = [text for text, (_, modified) in results.items() if not modified]
+        for stage in self.fallbacks:
+            if not misses:
+                break
+            try:
+                translations = stage.translate_batch(misses)
+            except Exception as e:  # 后备阶段失败时保留原文，不中断整个文档
+                logging.error(f"Fallback {stage.name} failed: {e}")
+                continue
+            remaining = []
+            for text, translation in zip(misses, translations):
+                if translation:
+                    results[text] = (translation, True)
+                else:
+                    remaining.append(text)
+            self.counters.fallback_hits += len(misses) - len(remaining)
+            logging.info(
+                "%s translated %d of %d segments",
+                stage.name,
+                len(misses) - len(remaining),
+                len(misses),
+            )
+            misses = remaining
+        return results
+
     def translate_paragraph(self, para):
         new_text, modified = self.translate_text(para.text)
         if modified:
@@ -128,17 +455,67 @@ class Translator:
             if not self.strict_punctuation:
                 run.font.color.rgb = RGBColor(255, 0, 0)  # 设置颜色为红色
 
+    def write_paragraph(self, para, new_text):
+        para.clear()  # 清除原始段落内容
+        run = para.add_run(new_text)  # 添加新内容
+        if not self.strict_punctuation:
+            run.font.color.rgb = RGBColor(255, 0, 0)  # 设置颜色为红色
+
+    def rewrite_paragraph(self, para, text, report, location, translations):
+        # translations 是按文本去重的结果表，同一文本在文档中只翻译一次
+        if not text.strip():
+            return False
+        result = translations.get(text)
+        if result is None:
+            with self.timings.phase("translate"):
+                result = translations[text] = self.translate_text(text)
+        new_text, modified = result
+        if modified:
+            with self.timings.phase("write_back"):
+                self.write_paragraph(para, new_text)
+        else:
+            report.add(text, location)
+        return modified
+
+    def translate_document_streaming(
+        self,
+        input_file,
+        output_file,
+        progress_callback=None,
+        include_headers_footers=False,
+    ):
+        # 不构建 python-docx 对象模型，内存占用与文档大小基本无关
+        self.counters.reset()
+        self.timings.reset()
+        rewriter = StreamingDocxRewriter(self, include_headers_footers)
+        report = rewriter.rewrite(input_file, output_file, progress_callback)
+        self.record_stats(input_file)
+        return report
+
+    def record_stats(self, input_file):
+        self.last_stats = self.counters.as_dict()
+        self.last_stats["phases"] = self.timings.as_dict()
+        logging.info("Translation stats for %s: %s", input_file, self.counters)
+        logging.info("Translation phases for %s: %s", input_file, self.timings)
+
     def translate_document(self, input_file, output_file, progress_callback=None):
-        doc = Document(input_file)
+        self.counters.reset()
+        self.timings.reset()
+        with self.timings.phase("parse"):
+            doc = Document(input_file)
         logging.info(f"Loaded document: {input_file}")
 
-        total_elements = len(doc.paragraphs)
-        for table in doc.tables:
-            for row in table.rows:
-                total_elements += len(row.cells)
+        # 第一遍：收集所有段落及其位置，合并单元格只访问一次，总数即进度总量
+        with self.timings.phase("traverse"):
+            segments = [
+                (para, para.text, location)
+                for para, location in iter_document_paragraphs(doc)
+            ]
 
+        # 第二遍：每个不同的非空文本只翻译一次，词典未命中的整批交给后备阶段
+        translations = dict.fromkeys(text for _, text, _ in segments if text.strip())
+        total_elements = len(translations) + len(segments)
         processed_elements = 0
-        untranslated_segments = []
 
         def update_progress():
             nonlocal processed_elements
@@ -146,34 +523,26 @@ class Translator:
             if progress_callback:
                 progress_callback(processed_elements / total_elements * 100)
 
-        for para in doc.paragraphs:
-            new_text, modified = self.translate_text(para.text)
-            if modified:
-                para.clear()  # 清除原始段落内容
-                para.add_run(new_text)  # 添加新内容
-                if not self.strict_punctuation:
-                    para.runs[-1].font.color.rgb = RGBColor(255, 0, 0)  # 设置颜色为红色
-            else:
-                untranslated_segments.append(para.text)
-            update_progress()
-
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        new_text, modified = self.translate_text(para.text)
-                        if modified:
-                            para.clear()  # 清除原始段落内容
-                            para.add_run(new_text)  # 添加新内容
-                            if not self.strict_punctuation:
-                                para.runs[-1].font.color.rgb = RGBColor(
-                                    255, 0, 0
-                                )  # 设置颜色为红色
-                        else:
-                            untranslated_segments.append(para.text)
-                        update_progress()
-
-        doc.save(output_file)
+        with self.timings.phase("translate"):
+            translations = self.translate_texts(translations, update_progress)
+
+        # 第三遍：把结果写回每一个位置，未翻译的段落汇总成报告
+        report = SegmentReport()
+        with self.timings.phase("write_back"):
+            for para, text, location in segments:
+                self.rewrite_paragraph(para, text, report, location, translations)
+                update_progress()
+
+        with self.timings.phase("save"):
+            doc.save(output_file)
         logging.info(f"Saved translated document: {output_file}")
+        self.record_stats(input_file)
+        logging.info("Translation cache stats: %s", self.cache_stats())
+        logging.info(
+            "%d untranslated segments (%d occurrences) in %s",
+            len(report),
+            report.occurrences(),
+            input_file,
+        )
 
-        return untranslated_segments
+        return report
@@ -0,0 +1,146 @@
+# treeview.py
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """Show a sliding window of a large row source in a ttk.Treeview.
+
+    Only the visible rows plus ``BUFFER`` extra rows exist as Treeview items;
+    scrolling rewrites those items in place instead of inserting every row.
+    ``row_count()`` returns the number of rows and ``get_row(index)`` the
+    values tuple for a row. Striping is computed from the absolute row index,
+    so it stays correct at any scroll position and dataset size.
+    """
+
+    BUFFER = 10
+    WHEEL_ROWS = 3
+
+    def __init__(self, tree, vsb, row_count, get_row):
+        self.tree = tree
+        self.vsb = vsb
+        self.row_count = row_count
+        self.get_row = get_row
+        self.top = 0
+        self.slots = []
+        self.slot_positions = {}
+        self.selected_index = None
+        self._rendering = False
+
+        vsb.configure(command=self.on_scrollbar)
+        tree.configure(yscrollcommand=self.on_tree_scrolled)
+        tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        tree.bind("<Configure>", lambda event: self.refresh(), add="+")
+        tree.bind("<MouseWheel>", self.on_mousewheel, add="+")
+        tree.bind("<Button-4>", lambda event: self.scroll(-self.WHEEL_ROWS), add="+")
+        tree.bind("<Button-5>", lambda event: self.scroll(self.WHEEL_ROWS), add="+")
+
+    def visible_rows(self):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        height = self.tree.winfo_height()
+        if height <= 1:  # 尚未布局时按默认高度估算
+            height = int(self.tree.cget("height")) * rowheight
+        return max(1, height // rowheight - 1)  # 减去表头
+
+    def refresh(self):
+        """Re-render the window, e.g. after rows were added or removed."""
+        total = self.row_count()
+        visible = self.visible_rows()
+        self.top = max(0, min(self.top, total - visible))
+        count = max(0, min(visible + self.BUFFER, total - self.top))
+
+        self._rendering = True
+        try:
+            while len(self.slots) < count:
+                slot = self.tree.insert("", "end")
+                self.slot_positions[slot] = len(self.slots)
+                self.slots.append(slot)
+            while len(self.slots) > count:
+                slot = self.slots.pop()
+                del self.slot_positions[slot]
+                self.tree.delete(slot)
+            for position, slot in enumerate(self.slots):
+                self.render_slot(slot, self.top + position)
+            self.tree.yview_moveto(0)
+            self.restore_selection()
+        finally:
+            self._rendering = False
+        if total:
+            self.vsb.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.vsb.set(0, 1)
+
+    def render_slot(self, slot, index):
+        tags = ("evenrow",) if index % 2 == 0 else ("oddrow",)
+        self.tree.item(slot, values=self.get_row(index), tags=tags)
+
+    def refresh_row(self, index):
+        """Update a single row in place if it is currently materialized."""
+        position = index - self.top
+        if 0 <= position < len(self.slots):
+            self.render_slot(self.slots[position], index)
+
+    def index_of(self, slot):
+        position = self.slot_positions.get(slot)
+        return None if position is None else self.top + position
+
+    def item_of(self, index):
+        position = index - self.top
+        if 0 <= position < len(self.slots):
+            return self.slots[position]
+        return None
+
+    def selected(self):
+        return self.selected_index
+
+    def select(self, index):
+        self.selected_index = index
+        self.scroll_to(index)
+
+    def restore_selection(self):
+        item = (
+            self.item_of(self.selected_index)
+            if self.selected_index is not None
+            else None
+        )
+        if item is not None:
+            self.tree.selection_set(item)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    def scroll_to(self, index):
+        visible = self.visible_rows()
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + visible:
+            self.top = index - visible + 1
+        self.refresh()
+
+    def scroll(self, rows):
+        self.top += rows
+        self.refresh()
+
+    def on_select(self, event):
+        if self._rendering:
+            return
+        selection = self.tree.selection()
+        self.selected_index = self.index_of(selection[0]) if selection else None
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = int(float(value) * self.row_count())
+            self.refresh()
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self.scroll(int(value) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS)
+        return "break"
+
+    def on_tree_scrolled(self, first, last):
+        # 键盘导航使 Treeview 自身滚动进缓冲区时，把偏移折算到窗口起点
+        if self._rendering or float(first) <= 0 or not self.slots:
+            return
+        offset = round(float(first) * len(self.slots))
+        if offset:
+            self.tree.after_idle(self.scroll, offset)
@@ -0,0 +1,26 @@
+# tests/conftest.py
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+LINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "lings")
+sys.path.insert(0, LINGS_DIR)
+
+from logutil import setup_logging  # noqa: E402
+
+# translator 导入时会在当前目录创建 translation.log，测试日志改写到临时目录
+setup_logging(os.path.join(tempfile.mkdtemp(prefix="lings-tests-"), "translation.log"))
+
+
+@pytest.fixture
+def write_dictionary(tmp_path):
+    def write(entries, name="en_cn_test.json"):
+        path = tmp_path / name
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"translations": entries}, f, ensure_ascii=False)
+        return str(path)
+
+    return write
@@ -0,0 +1,44 @@
+# tests/test_cli.py
+import json
+
+from docx import Document
+
+import cli
+from logutil import PhaseTimer, PhaseTotals, format_phases
+
+
+def test_phase_totals_sum_document_phases():
+    totals = PhaseTotals()
+    assert not totals
+    first = totals.add({"phases": {"load_dictionary": 2.0, "parse": 0.1, "save": 0.3}})
+    totals.add({"phases": {"parse": 0.2, "translate": 0.5}})
+    assert first == {"parse": 0.1, "save": 0.3}
+    assert totals.as_dict() == {"parse": 0.3, "save": 0.3, "translate": 0.5}
+    assert totals.format() == format_phases(totals.totals)
+    assert totals.add({}) == {}
+
+
+def test_summary_phases_match_documents(write_dictionary, tmp_path, capsys):
+    dictionary = write_dictionary({"hello": "你好"})
+    for name in ("a", "b"):
+        doc = Document()
+        doc.add_paragraph("hello")
+        doc.save(tmp_path / f"{name}.docx")
+    summary_path = tmp_path / "summary.json"
+    argv = ["-d", dictionary, "-o", str(tmp_path / "out"), "--no-fallback"]
+    argv += ["--summary", str(summary_path)]
+    argv += [str(tmp_path / "a.docx"), str(tmp_path / "b.docx")]
+    assert cli.main(argv) == 0
+
+    with open(summary_path, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["succeeded"] == 2
+    # 终端输出和 JSON 汇总使用同一份按文档统计的阶段耗时
+    err = capsys.readouterr().err
+    expected = PhaseTotals()
+    for document in summary["documents"]:
+        phases = expected.add(document)
+        if format_phases(phases):
+            assert f"    {format_phases(phases)}\n" in err
+    assert summary["phases"] == expected.as_dict()
+    assert set(summary["phases"]) <= set(PhaseTimer.DOCUMENT_PHASES)
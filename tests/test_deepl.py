@@ -0,0 +1,68 @@
+# tests/test_deepl.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from plugins import deepl_stub, deepl_translator
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = deepl_stub.make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/v2/translate"
+    monkeypatch.setattr(deepl_translator, "DEEPL_API_URL", url)
+    monkeypatch.setattr(deepl_translator, "_session", None)
+    monkeypatch.setenv("LINGS_MT_CACHE", "")  # 不读写机器翻译缓存
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def expected(texts, target_lang="ZH"):
+    return [f"[{target_lang}] {text}" for text in texts]
+
+
+def test_batches_fit_request_limits(stub):
+    # 短文本受条数限制，长文本受请求体大小限制
+    texts = [f"segment {i}" for i in range(237)]
+    texts += [f"{i} " + "long text " * 300 for i in range(100)]
+    assert deepl_translator.translate_batch(texts, "ZH") == expected(texts)
+    assert stub.max_texts == deepl_stub.MAX_TEXTS_PER_REQUEST
+    assert stub.max_bytes <= deepl_stub.MAX_REQUEST_BYTES
+    assert stub.requests == len(list(deepl_translator.iter_batches(texts)))
+    assert stub.requests < 20
+
+
+def test_retries_honour_retry_after(stub, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(deepl_translator, "time", SimpleNamespace(sleep=sleeps.append))
+    stub.retry_after = 3
+    stub.fail_next += [429, 503]
+    assert deepl_translator.translate_batch(["hello"], "ZH") == ["[ZH] hello"]
+    assert sleeps == [3, 3]
+    assert stub.requests == 3
+
+
+def test_gives_up_after_max_retries(stub, monkeypatch):
+    monkeypatch.setattr(deepl_translator, "time", SimpleNamespace(sleep=lambda _: None))
+    stub.fail_next += [503] * (deepl_translator.MAX_RETRIES + 1)
+    assert deepl_translator.translate_batch(["hello", "world"], "ZH") == [None, None]
+    assert stub.requests == deepl_translator.MAX_RETRIES + 1
+    assert stub.texts == 0
+
+
+def test_concurrency_is_bounded(stub):
+    stub.latency = 0.05
+    texts = [f"segment {i}" for i in range(1000)]  # 20 个请求
+    assert deepl_translator.translate_batch(texts, "ZH") == expected(texts)
+    assert 1 < stub.max_active <= deepl_translator.MAX_WORKERS
+
+
+def test_duplicates_are_sent_once(stub):
+    texts = ["a", "b", "a", "c", "b"] * 40
+    assert deepl_translator.translate_batch(texts, "ZH") == expected(texts)
+    assert stub.texts == 3
+    assert stub.requests == 1
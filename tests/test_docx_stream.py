@@ -0,0 +1,141 @@
+# tests/test_docx_stream.py
+import os
+import zipfile
+
+import pytest
+from docx import Document
+from lxml import etree
+
+import docx_stream
+from translator import Translator
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+ENTRIES = {
+    "hello world": "你好世界",
+    "good morning": "早上好",
+    "world": "世界",
+    "cell": "单元格",
+    "inner": "内部",
+}
+
+UNTOUCHED = (
+    '<w:p w:rsidR="00AB12CD"><w:r><w:t xml:space="preserve">'
+    "unknown text</w:t></w:r></w:p>"
+)
+
+
+def paragraph(text, properties=""):
+    return f"<w:p>{properties}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def table(*cells):
+    row = "".join(f"<w:tc>{cell}</w:tc>" for cell in cells)
+    return f"<w:tbl><w:tblPr/><w:tblGrid/><w:tr>{row}</w:tr></w:tbl>"
+
+
+BODY = "".join(
+    [
+        paragraph("hello world"),
+        "<!-- <w:p><w:r><w:t>world</w:t></w:r></w:p> -->",
+        '<?lings-marker a="<w:p>" ?>',
+        paragraph("<![CDATA[good morning]]>"),
+        paragraph("<![CDATA[a </w:p> <w:tbl> b]]>"),
+        "<w:p/>",
+        '<w:bookmarkStart w:id="0" w:name="start"/>',
+        paragraph("world", "<w:pPr/>"),
+        '<w:bookmarkEnd w:id="0"/>',
+        UNTOUCHED,
+        table(
+            paragraph("cell"),
+            paragraph("cell") + table(paragraph("inner")) + "<w:p/>",
+        ),
+        "<w:p><!-- in paragraph --><w:r><w:t>hello world</w:t></w:r></w:p>",
+    ]
+)
+
+
+def make_docx(path, body):
+    # 从 python-docx 的空白模板出发，替换 <w:body> 中 <w:sectPr> 之前的内容
+    Document().save(path)
+    with zipfile.ZipFile(path) as z:
+        members = {info: z.read(info) for info in z.infolist()}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for info, data in members.items():
+            if info.filename == "word/document.xml":
+                xml = data.decode("utf-8")
+                start = xml.index("<w:body>") + len("<w:body>")
+                end = xml.index("<w:sectPr")
+                data = (xml[:start] + body + xml[end:]).encode("utf-8")
+            z.writestr(info, data)
+    return str(path)
+
+
+def document_xml(path):
+    with zipfile.ZipFile(path) as z:
+        return z.read("word/document.xml")
+
+
+def paragraph_texts(path):
+    root = etree.fromstring(document_xml(path))
+    return ["".join(p.itertext()) for p in root.iter(f"{{{W}}}p")]
+
+
+@pytest.fixture
+def translator(write_dictionary):
+    return Translator("en_cn", write_dictionary(ENTRIES))
+
+
+@pytest.fixture
+def source(tmp_path):
+    return make_docx(tmp_path / "source.docx", BODY)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+def test_matches_translate_document(
+    translator, source, tmp_path, monkeypatch, chunk_size
+):
+    # 小块读取时标签、注释和 CDATA 会被切在块边界上
+    monkeypatch.setattr(docx_stream, "CHUNK_SIZE", chunk_size)
+    expected = translator.translate_document(source, str(tmp_path / "docx.docx"))
+    output = str(tmp_path / "streaming.docx")
+    report = translator.translate_document_streaming(source, output)
+
+    assert paragraph_texts(output) == paragraph_texts(tmp_path / "docx.docx")
+    assert report.as_list() == expected.as_list()
+    texts = paragraph_texts(output)
+    assert texts.count("你好世界") == 2
+    assert "早上好" in texts and "a </w:p> <w:tbl> b" in texts
+    assert texts.count("单元格") == 2 and "内部" in texts
+
+
+def test_copies_untouched_content(translator, source, tmp_path):
+    output = str(tmp_path / "streaming.docx")
+    translator.translate_document_streaming(source, output)
+    xml = document_xml(output)
+    assert UNTOUCHED.encode("utf-8") in xml
+    assert b"<!-- <w:p><w:r><w:t>world</w:t></w:r></w:p> -->" in xml
+    assert b'<?lings-marker a="<w:p>" ?>' in xml
+    assert b'<w:bookmarkStart w:id="0" w:name="start"/>' in xml
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(output) as zout:
+        assert zin.namelist() == zout.namelist()
+        for name in zin.namelist():
+            if name != "word/document.xml":
+                assert zin.read(name) == zout.read(name)
+
+
+def test_failure_leaves_no_partial_output(translator, tmp_path):
+    source = make_docx(
+        tmp_path / "broken.docx",
+        paragraph("hello world") * 50 + "<w:p><w:r></w:x></w:p>",
+    )
+    output = tmp_path / "out.docx"
+    output.write_bytes(b"previous")
+    with pytest.raises(etree.XMLSyntaxError):
+        translator.translate_document_streaming(source, str(output))
+    assert output.read_bytes() == b"previous"
+    assert sorted(os.listdir(tmp_path)) == [
+        "broken.docx",
+        "en_cn_test.json",
+        "out.docx",
+    ]
@@ -0,0 +1,47 @@
+# tests/test_entrystore.py
+import pytest
+
+from entrystore import EntryStore
+
+
+@pytest.fixture
+def store():
+    return EntryStore([("hello", "你好"), ("world", ""), ("hello", "您好")])
+
+
+def test_duplicated_originals_keep_separate_rows(store):
+    first, _, third = (store.row_id(i) for i in range(3))
+    assert len(store) == 3
+    assert store.find("hello") == [first, third]
+    assert store.get(third) == ("hello", "您好")
+    assert store.to_dict() == {"hello": "您好", "world": ""}
+    assert not store.dirty
+
+
+def test_add_update_delete(store):
+    first, second, third = (store.row_id(i) for i in range(3))
+    added = store.add("hello", "哈喽")
+    assert store.dirty
+    assert store.find("hello") == [first, third, added]
+    assert store.index_of(added) == 3
+
+    assert store.update(third, 0, "world")
+    assert not store.update(third, 0, "world")
+    assert store.find("hello") == [first, added]
+    assert store.find("world") == [second, third]
+    assert store.update(first, 1, "嗨")
+    assert store.find("hello") == [first, added]
+
+    assert store.delete(0) == first
+    assert store.find("hello") == [added]
+    assert [store.index_of(row_id) for row_id in (second, third, added)] == [0, 1, 2]
+    with pytest.raises(KeyError):
+        store.index_of(first)
+    assert first not in store and added in store
+    assert list(store) == [("world", ""), ("world", "您好"), ("hello", "哈喽")]
+
+    store.delete(2)
+    assert store.find("hello") == []
+    assert "hello" not in store.keys
+    store.mark_clean()
+    assert not store.dirty
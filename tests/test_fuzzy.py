@@ -0,0 +1,21 @@
+# tests/test_fuzzy.py
+from fuzzy import FuzzyIndex
+
+
+def test_similar_tokens_prefers_words_of_similar_length():
+    index = FuzzyIndex({"colourfulness": "丰富多彩", "colour": "颜色"})
+    assert index.similar_tokens("colourr")[0] == "colour"
+
+
+def test_lookup_finds_entry_with_one_typo():
+    index = FuzzyIndex(
+        {
+            "passport number": "护照号码",
+            "passport office": "护照办公室",
+            "date of birth": "出生日期",
+        }
+    )
+    score, source, translation = index.lookup("pasport number")
+    assert (source, translation) == ("passport number", "护照号码")
+    assert 0.9 < score < 1
+    assert index.lookup("completely different") is None
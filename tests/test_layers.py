@@ -0,0 +1,90 @@
+# tests/test_layers.py
+import json
+
+from layers import LayeredDict, LayeredPhrases, layer_files
+from matcher import TokenTrie
+from translator import Translator
+
+
+def test_upper_layer_wins():
+    client = {"contract": "合约"}
+    general = {"contract": "合同", "party": "当事人"}
+    layered = LayeredDict(client, general)
+    assert layered["contract"] == "合约"
+    assert layered.get("party") == "当事人"
+    assert layered.get("missing", "-") == "-"
+    assert layered.layer_of("contract") == 0
+    assert layered.layer_of("party") == 1
+    assert layered.layer_of("missing") is None
+
+
+def test_iteration_skips_shadowed_keys():
+    layered = LayeredDict(
+        {"b": "2", "a": "1"}, {"a": "x", "c": "3"}, {"c": "y", "d": "4"}
+    )
+    assert list(layered) == ["b", "a", "c", "d"]
+    assert len(layered) == 4
+    assert dict(layered.items()) == {"b": "2", "a": "1", "c": "3", "d": "4"}
+
+
+def test_writes_go_to_the_top_layer():
+    top, lower = {}, {"a": "1"}
+    layered = LayeredDict(top, lower)
+    layered["a"] = "one"
+    layered["b"] = "2"
+    assert top == {"a": "one", "b": "2"}
+    assert lower == {"a": "1"}
+    del layered["a"]
+    assert layered["a"] == "1"
+    assert lower == {"a": "1"}
+
+
+def phrase_trie(entries):
+    trie = TokenTrie()
+    for phrase, value in entries.items():
+        trie.add(phrase.split(), value)
+    return trie
+
+
+def test_longest_phrase_in_any_layer_wins():
+    phrases = LayeredPhrases(
+        [
+            phrase_trie({"new york": "纽约（客户）"}),
+            TokenTrie(),
+            phrase_trie({"new york": "纽约", "new york city": "纽约市"}),
+        ]
+    )
+    assert len(phrases) == 3
+    assert phrases.longest_match("new york city".split()) == (3, "纽约市")
+    # 长度相同时取上层的译文
+    assert phrases.longest_match("new york state".split()) == (2, "纽约（客户）")
+    assert phrases.longest_match("old york".split()) is None
+
+
+def test_layer_files():
+    metadata = [
+        {"file": "en_cn_law.json", "description": "Law", "layers": ["en_cn.json"]},
+        {"file": "en_cn.json", "description": "General"},
+    ]
+    assert layer_files(metadata, "Law") == ["en_cn_law.json", "en_cn.json"]
+    assert layer_files(metadata, "en_cn.json") == ["en_cn.json"]
+    assert layer_files(metadata, "Medicine") is None
+
+
+def test_translator_saves_only_the_top_layer(write_dictionary):
+    top = write_dictionary({"contract": "合约"}, "en_cn_client.json")
+    lower = write_dictionary(
+        {"contract": "合同", "party": "当事人", "new york": "纽约"},
+        "en_cn_general.json",
+    )
+    with open(lower, "rb") as f:
+        before = f.read()
+    translator = Translator("en_cn", [top, lower])
+    assert translator.translate_text("contract party") == ("合约 当事人", True)
+    assert translator.translate_text("new york") == ("纽约", True)
+    translator.add_translation("party", "一方")
+    assert translator.translate_text("contract party") == ("合约 一方", True)
+    with open(top, "r", encoding="utf-8") as f:
+        assert json.load(f)["translations"] == {"contract": "合约", "party": "一方"}
+    with open(lower, "rb") as f:
+        assert f.read() == before
@@ -0,0 +1,104 @@
+# tests/test_matcher.py
+from matcher import AhoCorasick, TokenTrie
+from normalization import fold_text
+
+
+def automaton(entries):
+    matcher = AhoCorasick()
+    for key, value in entries.items():
+        matcher.add(key, value)
+    return matcher.build()
+
+
+def test_overlapping_keys_resolve_leftmost_longest():
+    matcher = automaton({"he": "1", "she": "2", "hers": "3", "his": "4"})
+    assert sorted(matcher.iter_matches("ushers")) == [
+        (1, 4, "she"),
+        (2, 4, "he"),
+        (2, 6, "hers"),
+    ]
+    # 最左优先：she 先开始，hers 与之重叠被舍弃
+    assert matcher.find_all("ushers") == [(1, 4, "she")]
+    assert matcher.find_all("hershis") == [(0, 4, "hers"), (4, 7, "his")]
+
+
+def test_longest_key_wins_at_the_same_start():
+    matcher = automaton({"pass": "通过", "passport": "护照", "port": "港口"})
+    assert matcher.replace("passport") == ("护照", 1)
+    assert matcher.replace("passing port") == ("通过ing 港口", 2)
+    assert matcher.replace("nothing") == ("nothing", 0)
+
+
+def test_first_added_value_wins():
+    matcher = AhoCorasick()
+    matcher.add("key", "first")
+    matcher.add("key", "second")
+    assert len(matcher) == 1
+    assert matcher.replace("key") == ("first", 1)
+
+
+def test_keys_added_after_build_are_matched():
+    matcher = automaton({"cat": "猫"})
+    matcher.find_all("cat")
+    matcher.add("dog", "狗")
+    assert matcher.replace("cat dog") == ("猫 狗", 2)
+
+
+def test_unmatched_text_is_copied_from_source():
+    matcher = automaton({"karte": "地图"})
+    source = "Große KARTE"
+    assert matcher.replace(fold_text(source), source) == (source, 0)
+    source = "Stadt-Karte"
+    assert matcher.replace(fold_text(source, True), source) == ("Stadt-地图", 1)
+
+
+def test_casefold_expansion_does_not_shift_source():
+    # ß 折叠为 ss，长度不同时不能按下标从原文复制，改用折叠后的文本
+    matcher = automaton({"karte": "地图"})
+    source = "Straßen-Karte"
+    folded = fold_text(source, True)
+    assert len(folded) != len(source)
+    assert matcher.replace(folded, source) == ("strassen-地图", 1)
+    matcher = automaton({"straße": "街道"})
+    assert matcher.replace(fold_text("Straße", True), "Straße") == ("Straße", 0)
+    matcher = automaton({fold_text("Straße", True): "街道"})
+    assert matcher.replace(fold_text("Große Straße", True), "Große Straße") == (
+        "grosse 街道",
+        1,
+    )
+
+
+def phrase_trie(*phrases):
+    trie = TokenTrie()
+    for phrase in phrases:
+        trie.add(phrase.split(), phrase.upper())
+    return trie
+
+
+def test_token_trie_longest_match():
+    trie = phrase_trie("new york", "new york city", "york")
+    tokens = "i love new york city hall".split()
+    assert trie.longest_match(tokens, 2) == (5, "NEW YORK CITY")
+    assert trie.longest_match(tokens[:4], 2) == (4, "NEW YORK")
+    assert trie.longest_match(tokens, 3) == (4, "YORK")
+    assert trie.longest_match(tokens, 0) is None
+    # 只有前缀（new city 不是词条）时不算匹配
+    assert trie.longest_match(["new", "city"]) is None
+
+
+def test_token_trie_keeps_first_value_unless_replaced():
+    trie = phrase_trie("new york")
+    trie.add(["new", "york"], "second")
+    assert len(trie) == 1
+    assert trie.longest_match(["new", "york"]) == (2, "NEW YORK")
+    trie.add(["new", "york"], "third", replace=True)
+    assert len(trie) == 1
+    assert trie.longest_match(["new", "york"]) == (2, "third")
+
+
+def test_token_trie_prefix_matches_over_characters():
+    trie = TokenTrie()
+    for key in ("中国", "中国人", "人民"):
+        trie.add(key, key)
+    assert list(trie.prefix_matches("中国人民", 0)) == [(2, "中国"), (3, "中国人")]
+    assert list(trie.prefix_matches("中国人民", 2)) == [(4, "人民")]
@@ -0,0 +1,24 @@
+# tests/test_mtcache.py
+import multiprocessing
+
+import mtcache
+
+
+def translate_in_child(_):
+    cache = mtcache.get_cache()
+    cache.put_many("stub", [("world", "世界")], "ZH")
+    return id(cache.conn), cache.get("stub", "hello", "ZH")
+
+
+def test_forked_workers_open_their_own_connection(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINGS_MT_CACHE", str(tmp_path / "mt.sqlite3"))
+    monkeypatch.setattr(mtcache, "_cache", None)
+    cache = mtcache.get_cache()
+    cache.put_many("stub", [("hello", "你好")], "ZH")
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        results = pool.map(translate_in_child, range(4))
+    # 子进程重新打开连接，读得到父进程写入的内容，父进程的连接也仍然可用
+    assert all(conn != id(cache.conn) for conn, _ in results)
+    assert all(value == "你好" for _, value in results)
+    assert mtcache.get_cache() is cache
+    assert cache.get("stub", "world", "ZH") == "世界"
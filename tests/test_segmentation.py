@@ -0,0 +1,58 @@
+# tests/test_segmentation.py
+import pytest
+
+from translator import Translator
+
+
+@pytest.fixture
+def ja_zh(write_dictionary):
+    path = write_dictionary(
+        {"こんにちは": "你好", "世界": "世界", "world": "世界"}, "ja_zh_test.json"
+    )
+    return Translator("ja_zh", path)
+
+
+@pytest.fixture
+def zh_ar(write_dictionary):
+    path = write_dictionary(
+        {
+            "你好": "مرحبا",
+            "世界": "عالم",
+            "price": "سعر",
+            "总学分": "مجموع الساعات المعتمدة",
+        },
+        "zh_ar_test.json",
+    )
+    return Translator("zh_ar", path)
+
+
+def test_untranslated_text_is_left_unchanged(ja_zh, zh_ar):
+    assert ja_zh.translate_text("Hello there") == ("Hello there", False)
+    assert zh_ar.translate_text("Hello  there,\tagain") == (
+        "Hello  there,\tagain",
+        False,
+    )
+
+
+def test_unspaced_target_keeps_whitespace_between_words(ja_zh):
+    assert ja_zh.translate_text("こんにちは世界") == ("你好世界", True)
+    assert ja_zh.translate_text("Hello world") == ("Hello 世界", True)
+    assert ja_zh.translate_text("こんにちは, Bob and Alice") == (
+        "你好, Bob and Alice",
+        True,
+    )
+
+
+def test_separator_only_next_to_translations(zh_ar):
+    assert zh_ar.translate_text("你好世界") == ("مرحبا عالم", True)
+    assert zh_ar.translate_text("你好Bob") == ("مرحبا Bob", True)
+    assert zh_ar.translate_text("你好  Bob and Alice") == ("مرحبا  Bob and Alice", True)
+    assert zh_ar.translate_text("的你好的") == ("的 مرحبا 的", True)
+    assert zh_ar.translate_text("Bob price 你好") == ("Bob سعر مرحبا", True)
+
+
+def test_no_separator_around_punctuation(zh_ar):
+    assert zh_ar.translate_text("总学分: 120") == ("مجموع الساعات المعتمدة: 120", True)
+    assert zh_ar.translate_text("总学分：120") == ("مجموع الساعات المعتمدة：120", True)
+    assert zh_ar.translate_text("(你好)世界.") == ("(مرحبا) عالم.", True)
+    assert zh_ar.translate_text("你好(世界)") == ("مرحبا (عالم)", True)
@@ -0,0 +1,111 @@
+# tests/test_snapshot.py
+import json
+import os
+import runpy
+
+import pytest
+
+import snapshot
+from snapshot import OverlayDict, SnapshotPhrases
+from translator import Translator
+
+
+def saved_keys(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return list(json.load(f)["translations"])
+
+
+def test_saving_keeps_source_order(write_dictionary):
+    path = write_dictionary(
+        {"zeta": "泽塔", "Alpha": "阿尔法", "alpha": "阿尔法2", "beta": "贝塔"}
+    )
+    translator = Translator("en_cn", path, ignore_case=True, use_snapshot=True)
+    translator.add_translation("beta", "贝塔2")
+    translator.add_translation("gamma", "伽马")
+    assert saved_keys(path) == ["zeta", "Alpha", "alpha", "beta", "gamma"]
+    # 键冲突时仍是源文件中靠前的词条生效
+    assert translator.translate_text("ALPHA") == ("阿尔法", True)
+
+
+def test_touched_source_is_hashed_once(write_dictionary, monkeypatch):
+    path = write_dictionary({"hello": "你好"})
+    snapshot.load_snapshot(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    digests = []
+    file_digest = snapshot._file_digest
+    monkeypatch.setattr(
+        snapshot, "_file_digest", lambda p: digests.append(p) or file_digest(p)
+    )
+    for _ in range(3):
+        assert snapshot.load_snapshot(path)["hello"] == "你好"
+    assert digests == [path]
+
+
+def test_main_compiles_every_variant(write_dictionary, monkeypatch):
+    path = write_dictionary({"Hello!": "你好"})
+    monkeypatch.setattr("sys.argv", ["snapshot.py", path])
+    runpy.run_path(snapshot.__file__, run_name="__main__")
+    for ignore_case in (True, False):
+        for strict in (True, False):
+            variant = snapshot.normalized_variant(ignore_case, strict)
+            assert os.path.exists(snapshot.snapshot_path(path, variant))
+
+
+def test_round_trip_lookups(write_dictionary, tmp_path):
+    entries = {f"word{i}": f"词{i % 7}" for i in range(3000)}
+    entries.update({"über": "超过", "": "空", "a b": "短语"})
+    path = write_dictionary(entries)
+    compiled = snapshot.load_snapshot(path)
+    assert len(compiled) == len(entries)
+    assert dict(compiled.items()) == entries
+    assert list(compiled) == list(entries)
+    for key, value in entries.items():
+        assert compiled[key] == value
+        assert compiled.get(key) == value
+        assert key in compiled
+    assert compiled.get("word3000") is None
+    assert compiled.get("word3000", "-") == "-"
+    assert "missing" not in compiled and 1 not in compiled
+    with pytest.raises(KeyError):
+        compiled["missing"]
+
+
+def test_snapshot_phrases(write_dictionary):
+    path = write_dictionary(
+        {"New York": "纽约", "new york city hall": "纽约市政厅", "york": "约克"}
+    )
+    index = OverlayDict(
+        snapshot.load_snapshot(
+            path, snapshot.normalized_variant(True, True), str.casefold
+        )
+    )
+    compiled = index.base
+    assert compiled.has_phrase_prefix("new")
+    assert compiled.has_phrase_prefix("new york city")
+    assert not compiled.has_phrase_prefix("york")
+    assert not compiled.has_phrase_prefix("new york city hall")
+    assert compiled.n_phrases == 2
+
+    phrases = SnapshotPhrases(index)
+    tokens = "the new york city hall".split()
+    assert phrases.longest_match(tokens, 1) == (5, "纽约市政厅")
+    assert phrases.longest_match(tokens[:4], 1) == (3, "纽约")
+    assert phrases.longest_match(tokens, 0) is None
+    # 覆盖层中的修改和新增短语都能查到
+    index["new york"] = "纽约州"
+    assert phrases.longest_match(tokens[:4], 1) == (3, "纽约州")
+    phrases.add(["the", "new"], "这个新")
+    assert phrases.longest_match(tokens, 0) == (2, "这个新")
+    assert len(phrases) == 3
+
+
+def test_stale_or_invalid_snapshot_is_rebuilt(write_dictionary):
+    path = write_dictionary({"hello": "你好"})
+    assert snapshot.load_snapshot(path)["hello"] == "你好"
+    write_dictionary({"hello": "您好呀"})
+    assert snapshot.load_snapshot(path)["hello"] == "您好呀"
+    with open(snapshot.snapshot_path(path), "wb") as f:
+        f.write(b"not a snapshot" * 10)
+    assert snapshot.load_snapshot(path)["hello"] == "您好呀"
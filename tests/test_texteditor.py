@@ -0,0 +1,59 @@
+# tests/test_texteditor.py
+import os
+
+import pytest
+from docx import Document
+
+import texteditor
+from entrystore import EntryStore
+
+SEGMENTS = [
+    {"text": "passport numbr", "suggestion": "护照号码", "score": 0.93},
+    {"text": "unknown words", "suggestion": None, "score": 0.0},
+]
+
+
+class EditorStub:
+    def __init__(self, store):
+        self.store = store
+
+
+@pytest.fixture
+def output_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINGS_MT_CACHE", "")  # 保存时不写机器翻译缓存
+    path = tmp_path / "out.docx"
+    doc = Document()
+    doc.add_paragraph("已翻译的文档")
+    doc.save(path)
+    return path
+
+
+def paragraphs(path):
+    return [p.text for p in Document(path).paragraphs]
+
+
+def test_segments_are_saved_next_to_the_output(output_file):
+    target = texteditor.untranslated_path(str(output_file))
+    assert target == str(output_file.with_name("out.untranslated.docx"))
+    before = output_file.read_bytes()
+    store = EntryStore()
+    store.load([(s["text"], s["suggestion"] or "") for s in SEGMENTS])
+    texteditor.TextEditor.save_word_file(EditorStub(store), target, True)
+    assert output_file.read_bytes() == before
+    assert paragraphs(target) == ["passport numbr\n护照号码", "unknown words"]
+
+
+@pytest.mark.skipif(not os.environ.get("DISPLAY"), reason="needs a display")
+def test_editor_opened_with_segments_leaves_output_unchanged(output_file):
+    root = texteditor.tk.Tk()
+    try:
+        editor = texteditor.TextEditor(root, SEGMENTS, str(output_file))
+        before = output_file.read_bytes()
+        editor.save_word_file(editor.file_path.get(), False)
+    finally:
+        root.destroy()
+    assert output_file.read_bytes() == before
+    assert paragraphs(output_file.with_name("out.untranslated.docx")) == [
+        "护照号码",
+        "",
+    ]